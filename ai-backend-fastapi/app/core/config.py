@@ -6,6 +6,12 @@ class Settings(BaseSettings):
     IS_PRODUCTION: bool = False
     DEBUG: bool = False
 
+    # Slim API: don't mount routes that run ML inline (POST .../analyze).
+    # Analysis then only happens on workers (python -m app.worker).
+    API_SLIM_MODE: bool = False
+    # Workers load Whisper + the emotion model at startup instead of on the first job
+    WORKER_PRELOAD_MODELS: bool = True
+
     JWT_SECRET: str
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
@@ -32,10 +38,137 @@ class Settings(BaseSettings):
     AZURE_OPENAI_DEPLOYMENT: Optional[str] = None
     AZURE_OPENAI_API_VERSION: Optional[str] = None
 
+    # LLM HTTP clients are created once per process and shared by all requests/threads.
+    # Keep-alive pool sizing per provider (Groq / Azure OpenAI):
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_TIMEOUT_SECONDS: float = 60.0
+
+    # Provider health (see app/services/llm_health.py): a provider's circuit opens after
+    # N consecutive failures or when its error rate over the last LLM_HEALTH_WINDOW calls
+    # reaches LLM_CIRCUIT_ERROR_RATE; it is skipped for the cooldown, then probed once.
+    # Closed but degraded providers (error rate / EWMA latency above the thresholds) are
+    # tried after healthy ones; otherwise AI_PROVIDER_ORDER is kept.
+    LLM_HEALTH_WINDOW: int = 20
+    LLM_EWMA_ALPHA: float = 0.3
+    LLM_CIRCUIT_CONSECUTIVE_FAILURES: int = 3
+    LLM_CIRCUIT_ERROR_RATE: float = 0.5
+    LLM_CIRCUIT_MIN_CALLS: int = 10
+    LLM_CIRCUIT_COOLDOWN_SECONDS: float = 30.0
+    LLM_DEGRADED_ERROR_RATE: float = 0.2
+    LLM_SLOW_LATENCY_MS: float = 10000.0
+
+    # Hedged requests (generate_json_async(hedge=True), used by setup-ai): if the first
+    # provider hasn't answered after its LLM_HEDGE_PERCENTILE latency (LLM_HEDGE_DEFAULT_DELAY_MS
+    # until LLM_HEDGE_MIN_SAMPLES calls are seen), the next provider is called too and the
+    # first valid answer wins. At most LLM_HEDGE_MAX_EXTRA extra requests per call, and
+    # only LLM_HEDGE_BUDGET_RATIO of hedged calls (token bucket) may send one.
+    LLM_HEDGE_ENABLED: bool = True
+    LLM_HEDGE_PERCENTILE: float = 90.0
+    LLM_HEDGE_MIN_SAMPLES: int = 5
+    LLM_HEDGE_DEFAULT_DELAY_MS: float = 3000.0
+    LLM_HEDGE_MIN_DELAY_MS: float = 300.0
+    LLM_HEDGE_MAX_EXTRA: int = 1
+    LLM_HEDGE_BUDGET_RATIO: float = 0.2
+
+    # LLM response cache (see app/services/llm_cache.py) for calls that pass a prompt_version:
+    # in-process LRU of LLM_CACHE_MEMORY_ITEMS entries + shared Mongo `llm_cache`, trimmed
+    # to the newest LLM_CACHE_MAX_DOCUMENTS (~1-5 KB each; 0 = TTL only)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_TTL_HOURS: float = 72.0
+    LLM_CACHE_MEMORY_ITEMS: int = 256
+    LLM_CACHE_MAX_DOCUMENTS: int = 50000
+
+    # Batch scoring (score_answers_batch / POST .../score-all): answers per LLM call
+    SCORING_BATCH_SIZE: int = 5
+
     CLOUDINARY_CLOUD_NAME: Optional[str] = None
     CLOUDINARY_API_KEY: Optional[str] = None
     CLOUDINARY_API_SECRET: Optional[str] = None
 
+    # Object storage for resumes / answer videos / TTS audio (see app/services/storage.py):
+    # "cloudinary", "local" (served from /uploads) or "memory" (tests)
+    STORAGE_BACKEND: str = "cloudinary"
+    STORAGE_LOCAL_DIR: str = "uploads/storage"
+    STORAGE_PUBLIC_BASE_URL: str = "http://localhost:8000"
+    STORAGE_UPLOAD_THREADS: int = 4
+    # Spooled answer videos (scratch/videos) nobody needs any more are deleted after this
+    # age; the API sweeps every SPOOL_SWEEP_INTERVAL_MINUTES
+    SPOOL_MAX_AGE_HOURS: float = 24.0
+    SPOOL_SWEEP_INTERVAL_MINUTES: float = 30.0
+
+    # Analysis job queue (Mongo-backed, consumed by `python -m app.worker`)
+    JOB_LEASE_SECONDS: int = 300
+    JOB_HEARTBEAT_SECONDS: int = 30
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: int = 30
+    WORKER_CONCURRENCY: int = 1
+    WORKER_POLL_SECONDS: float = 2.0
+    # Threads per worker process for independent pipeline stages (transcription ‖ emotion)
+    PIPELINE_STAGE_THREADS: int = 2
+    # Admission control on answer upload: above this many queued + running jobs the
+    # API either rejects with 503 + Retry-After ("reject") or accepts the upload and
+    # queues it behind all normal-priority work ("defer")
+    ADMISSION_MAX_PENDING_JOBS: int = 200
+    ADMISSION_POLICY: str = "defer"
+    ADMISSION_RETRY_AFTER_SECONDS: int = 60
+
+    # Video download on workers (streamed to disk, resumed with Range requests)
+    VIDEO_DOWNLOAD_CHUNK_BYTES: int = 1024 * 1024
+    VIDEO_DOWNLOAD_TIMEOUT_SECONDS: int = 30
+    VIDEO_DOWNLOAD_MAX_RESUMES: int = 3
+
+    # Transcription engine: "whisper" (openai-whisper, fp32) or "faster-whisper" (CTranslate2, int8)
+    TRANSCRIBE_ENGINE: str = "whisper"
+    TRANSCRIBE_MODEL: str = "base"
+    TRANSCRIBE_COMPUTE_TYPE: str = "int8"  # faster-whisper only
+    TRANSCRIBE_BEAM_SIZE: int = 1
+    TRANSCRIBE_THREADS: int = 0  # 0 = library default
+    # Default spoken language (e.g. "en"); a session's own `language` wins. None = auto-detect
+    TRANSCRIBE_LANGUAGE: Optional[str] = None
+
+    # Stream 16 kHz PCM from ffmpeg straight into the transcriber (no WAV on disk)
+    AUDIO_IN_MEMORY: bool = True
+
+    # Voice-activity detection before transcription (energy based)
+    VAD_ENABLED: bool = True
+    VAD_MIN_DB: float = -45.0  # absolute floor (dBFS) for a frame to count as speech
+    VAD_MARGIN_DB: float = 10.0  # ...and at least this much above the clip's noise floor
+    VAD_MAX_THRESHOLD_DB: float = -30.0  # cap on noise floor + margin (floor may sit on speech)
+    VAD_PAD_MS: int = 300  # kept around every speech frame
+    VAD_MIN_SILENCE_MS: int = 800  # shorter pauses are kept as-is
+    VAD_MIN_SPEECH_MS: int = 250  # less speech than this = empty transcript
+
+    # Chunked uploads: audio received so far is transcribed in segments cut at pauses
+    SEGMENT_GUARD_SECONDS: float = 1.0  # never cut closer than this to the end of received audio
+    SEGMENT_MIN_SECONDS: float = 5.0  # wait for at least this much new audio
+    SEGMENT_MAX_SECONDS: float = 30.0  # cut even without a pause once this much is pending
+    SEGMENT_PAUSE_MS: int = 300  # shortest silence that counts as a cut point
+
+    # Transcript/emotion cache keyed by video content hash + engine version (Mongo analysis_cache)
+    ANALYSIS_CACHE_ENABLED: bool = True
+    ANALYSIS_CACHE_TTL_DAYS: int = 30
+
+    # Emotion frame sampling: "fps" (N samples per second of video),
+    # "keyframes" (I-frames only, other frames are never decoded) or "every_n" (every Nth frame)
+    EMOTION_SAMPLING_MODE: str = "fps"
+    EMOTION_SAMPLES_PER_SECOND: float = 2.0
+    EMOTION_FRAME_STEP: int = 15
+    # Sampled frames are classified in batches of this size (one forward pass per batch)
+    EMOTION_BATCH_SIZE: int = 16
+    EMOTION_DETECTOR_BACKEND: str = "opencv"
+    # Wall-clock limit on one frame-decoding ffmpeg run (killed after this, the job fails)
+    EMOTION_DECODE_TIMEOUT_SECONDS: int = 600
+    # Adaptive sampling: cap on analyzed frames per answer, skip near-duplicate frames
+    # (perceptual-hash distance <= EMOTION_DUP_HAMMING, 0 = off) except EMOTION_MIN_FRAMES
+    # evenly spread samples that are always analyzed, and stop once the dominant-emotion
+    # vote is settled (leader vs runner-up sign test at EMOTION_STOP_Z)
+    EMOTION_MAX_FRAMES: int = 60
+    EMOTION_MIN_FRAMES: int = 8
+    EMOTION_DUP_HAMMING: int = 3
+    EMOTION_STOP_Z: float = 2.58
+
     class Config:
         env_file = ".env"
 
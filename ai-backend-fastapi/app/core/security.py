@@ -107,7 +107,7 @@ def required_role(required_role: str):
     async def role_checker(current_user = Depends(get_current_user)):
         print(f"[Backend 🎤] Role check – required: {required_role}, user role: {current_user.get('role')}")
 
-        if current_user["role"] != required_role:
+        if current_user.get("role") != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have permission to access this resource"
@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -10,11 +12,13 @@ from app.routers.interview import router as interview_router
 from app.routers.interview_ai import router as interview_ai_router
 from app.routers.interview_execution import router as interview_execution_router
 from app.routers.interview_video import router as interview_video_router
-from app.routers.interview_analysis import router as interview_analysis_router
 from app.routers.interview_scoring import router as interview_scoring_router
 from app.routers.tts import router as tts_router
 from app.routers.interview_report import router as interview_report_router
 from app.routers.recruiter.jobs import router as jobs_router
+from app.routers.pipeline_metrics import router as pipeline_metrics_router
+from app.services.llm_cache import ensure_llm_cache_indexes
+from app.services.upload_spool import sweep_spool
 
 
 app = FastAPI(title=settings.APP_NAME)
@@ -47,15 +51,33 @@ app.include_router(interview_router)
 app.include_router(interview_ai_router)
 app.include_router(interview_execution_router)
 app.include_router(interview_video_router)
-app.include_router(interview_analysis_router)
+if not settings.API_SLIM_MODE:
+    # Inline analysis route – the only API route that runs Whisper/DeepFace in-process
+    from app.routers.interview_analysis import router as interview_analysis_router
+
+    app.include_router(interview_analysis_router)
 app.include_router(interview_scoring_router)
 app.include_router(tts_router)
 app.include_router(interview_report_router)
 app.include_router(jobs_router)
+app.include_router(pipeline_metrics_router)
+
+
+async def _spool_sweeper():
+    # Spool files live on the API node – remove the ones no answer needs any more
+    while True:
+        try:
+            await asyncio.to_thread(sweep_spool)
+        except Exception as e:
+            print("[Backend 🎤] Main: Spool sweep fail –", str(e))
+        await asyncio.sleep(settings.SPOOL_SWEEP_INTERVAL_MINUTES * 60)
 
 
 @app.on_event("startup")
 async def startup():
+    # LLM cache TTL index – also needed in API-only deployments (workers create it too)
+    await asyncio.to_thread(ensure_llm_cache_indexes)
+    app.state.spool_sweeper = asyncio.create_task(_spool_sweeper())
     print("[Backend 🎤] Main: Server uth raha hai – sab routes load ho gaye, CORS + uploads ready! 🚀")
 
 
@@ -35,6 +35,8 @@ class InterviewSessionInDB(BaseModel):
 
     job_description: Optional[str] = None
 
+    language: Optional[str] = None  # pinned transcription language, e.g. "en"
+
     ai_context: Optional[AIContext] = None
 
     interviewer: Optional[InterviewerConfig] = None
@@ -6,9 +6,10 @@ from app.services.resume_parser import extract_text_from_resume
 from app.core.logger import get_logger
 import os
 import uuid
+from typing import Optional
 
-import cloudinary
-import cloudinary.uploader
+from app.services.storage import get_storage
+from app.services.transcription import normalize_language
 
 
 logger = get_logger(__name__)
@@ -62,11 +63,21 @@ async def list_interviews(current_user=Depends(get_current_user)):
 async def create_interview(
     resume: UploadFile = File(...),
     job_description: str = Form(...),
+    language: Optional[str] = Form(None),
     current_user=Depends(get_current_user)
 ):
     print("[Backend 🎤] Interview: Create pe aaye – resume + JD le rahe hain, user_id =", current_user["_id"])
     logger.info("Creating interview for user_id=%s", current_user["_id"])
 
+    try:
+        language = normalize_language(language)
+    except ValueError:
+        print("[Backend 🎤] Interview: Language code samajh nahi aaya –", language, "– 422!")
+        raise HTTPException(
+            status_code=422,
+            detail="Unsupported language. Use an ISO-639-1 code such as \"en\" or \"hi\"."
+        )
+
     try:
         file_ext = resume.filename.split(".")[-1]
         file_name = f"{uuid.uuid4()}.{file_ext}"
@@ -90,7 +101,7 @@ async def create_interview(
         print("[Backend 🎤] Interview: File disk pe aa gaya – ab text nikaalenge!")
 
         logger.info("Extracting resume text")
-        # extract text from resume and upload to Cloudinary
+        # extract text from resume and upload to object storage
         try:
             extracted_text = extract_text_from_resume(file_path)
         except Exception as e:
@@ -110,15 +121,15 @@ async def create_interview(
                 )
 
         try:
-        # 3️⃣ Upload to Cloudinary
-            upload_result = cloudinary.uploader.upload(
+        # 3️⃣ Upload to object storage (off the event loop)
+            stored = await get_storage().upload_file(
                 file_path,
-                resource_type="raw",
                 folder="ai-interview/resumes",
+                resource_type="raw",
             )
-            resume_url = upload_result["secure_url"]
-            public_id = upload_result["public_id"]
-            print("[Backend 🎤] Interview: Resume Cloudinary pe upload ho gaya –", resume_url)
+            resume_url = stored.url
+            public_id = stored.key
+            print("[Backend 🎤] Interview: Resume storage pe upload ho gaya –", resume_url)
         finally:
         # 4️⃣ Clean up local file
             if os.path.exists(file_path):
@@ -135,6 +146,8 @@ async def create_interview(
                 "extracted_text": extracted_text
             },
             "job_description": job_description,
+            # Spoken language for transcription (e.g. "en") – skips per-answer language detection
+            "language": language,
             "ai_context": None
         }
 
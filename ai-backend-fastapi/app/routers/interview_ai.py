@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from bson import ObjectId
 from app.core.database import db
 from app.core.security import get_current_user
-from app.services.ai_service import analyze_resume_and_jd
+from app.services.ai_service import analyze_resume_and_jd_async
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -36,7 +36,7 @@ async def setup_ai(
         resume_text = session["resume"]["extracted_text"]
         print("[Backend 🎤] Interview AI: Resume + JD AI ko bhej rahe hain – questions maang rahe hain!")
 
-        ai_result = analyze_resume_and_jd(
+        ai_result = await analyze_resume_and_jd_async(
             resume_text,
             session["job_description"]
         )
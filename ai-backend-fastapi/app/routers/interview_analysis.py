@@ -50,7 +50,10 @@ async def analyze_answer(
         print("[Backend 🎤] Analysis: Answer record nahi mila – 404!")
         raise HTTPException(status_code=404, detail="Answer not found")
 
-    video_path = answer["video_path"]
+    # Local spool copy if the pipeline hasn't cleaned it up yet, else the stored copy
+    video_path = answer.get("spool_path") if answer.get("spool_path") and os.path.exists(answer["spool_path"]) else answer.get("video_path")
+    if not video_path:
+        raise HTTPException(status_code=409, detail="Video not stored yet")
     audio_path = os.path.join(
         AUDIO_DIR, f"{question_id}.wav"
     )
@@ -5,6 +5,7 @@ from datetime import datetime
 from app.core.database import db
 from app.core.security import get_current_user
 from app.core.logger import get_logger
+from app.services.job_queue import queue_position
 
 logger = get_logger(__name__)
 
@@ -242,13 +243,21 @@ async def answer_status(interview_id: str, question_id: str, current_user=Depend
     if not answer:
         return {
             "status": "missing",
+            "queue_position": None,
+            "deferred": False,
             "has_transcript": False,
             "has_score": False,
             "has_feedback": False,
         }
 
+    status = answer.get("status", "unknown")
+    # Position in the analysis queue while waiting for a worker (1 = next to run)
+    position = await queue_position(answer["job_id"]) if status == "queued" and answer.get("job_id") else None
+
     return {
-        "status": answer.get("status", "unknown"),
+        "status": status,
+        "queue_position": position,
+        "deferred": bool(answer.get("deferred")),
         "has_transcript": bool(answer.get("transcript")),
         "has_score": bool(answer.get("score")),
         "has_feedback": bool(answer.get("feedback")),
@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from bson import ObjectId
 
 from app.core.database import db
 from app.core.security import get_current_user
-from app.services.scoring_service import score_answer
+from app.services.scoring_service import score_answer_async, score_answers_batch_async
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -34,7 +34,7 @@ async def score_question(
     })
     print("[Backend 🎤] Scoring: Question + answer mil gaya – GPT ko bhej ke score maang rahe hain!")
 
-    result = score_answer(
+    result = await score_answer_async(
         question["question_text"],
         answer["transcript"],
         answer["emotion"],
@@ -58,3 +58,74 @@ async def score_question(
         "message": "Scoring completed",
         "score": result
     }
+
+
+@router.post("/{interview_id}/score-all")
+async def score_all_questions(
+    interview_id: str,
+    only_unscored: bool = Query(False, description="Skip answers that already have a score"),
+    current_user=Depends(get_current_user)
+):
+    """Score every transcribed answer of the interview, several answers per LLM call."""
+    print("[Backend 🎤] Scoring: Saare answers ek saath score karne hain – interview =", interview_id)
+    logger.info("Scoring all answers | interview_id=%s", interview_id)
+
+    session = await db.interview_sessions.find_one({
+        "_id": ObjectId(interview_id),
+        "user_id": str(current_user["_id"])
+    })
+    if not session:
+        print("[Backend 🎤] Scoring: Session nahi mila – 404!")
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    query = {"session_id": interview_id, "transcript": {"$nin": [None, ""]}}
+    if only_unscored:
+        query["score"] = {"$exists": False}
+    answers = await db.interview_answers.find(query).to_list(length=None)
+    if not answers:
+        print("[Backend 🎤] Scoring: Koi transcript wala answer nahi – 400!")
+        raise HTTPException(status_code=400, detail="No answers ready for scoring")
+
+    question_ids = [ObjectId(a["question_id"]) for a in answers]
+    questions = {
+        str(q["_id"]): q["question_text"]
+        async for q in db.interview_questions.find({"_id": {"$in": question_ids}}, {"question_text": 1})
+    }
+    answers = [a for a in answers if a["question_id"] in questions]
+
+    scores = await score_answers_batch_async([
+        {
+            "question": questions[a["question_id"]],
+            "transcript": a["transcript"],
+            "emotion": a.get("emotion"),
+            "confidence": a.get("confidence"),
+        }
+        for a in answers
+    ])
+
+    results = []
+    for answer, result in zip(answers, scores):
+        if result is None:
+            results.append({"question_id": answer["question_id"], "error": "Scoring failed"})
+            continue
+        await db.interview_answers.update_one(
+            {"_id": answer["_id"]},
+            {"$set": {
+                "score": {
+                    "accuracy": result["accuracy"],
+                    "communication": result["communication"],
+                    "behavior": result["behavior"]
+                },
+                "feedback": result["feedback"]
+            }}
+        )
+        results.append({"question_id": answer["question_id"], "score": result})
+
+    scored = sum(1 for r in results if "score" in r)
+    print("[Backend 🎤] Scoring:", scored, "/", len(results), "answers score ho gaye – DB mein save!")
+    return {
+        "message": "Scoring completed",
+        "scored": scored,
+        "failed": len(results) - scored,
+        "results": results,
+    }
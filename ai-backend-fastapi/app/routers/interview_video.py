@@ -1,27 +1,88 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
 from bson import ObjectId
 import os
 import uuid
 from datetime import datetime
-import cloudinary
-import cloudinary.uploader
+from pymongo import ReturnDocument
 
 from app.core.database import db
 from app.core.security import get_current_user
 from app.core.logger import get_logger
-from app.services.background_jobs import process_answer_pipeline
+from app.services.job_queue import (
+    JOB_PRIORITY_NORMAL,
+    PROCESS_ANSWER_JOB,
+    STORE_VIDEO_JOB,
+    TRANSCRIBE_SEGMENT_JOB,
+    AdmissionRejected,
+    admit_job,
+    enqueue_job,
+)
+from app.services.upload_spool import SPOOL_HOLDERS, spool_path_for
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/interviews", tags=["Interview Video"])
 
-BASE_VIDEO_DIR = "uploads/videos"
-os.makedirs(BASE_VIDEO_DIR, exist_ok=True)
+# Chunked uploads are assembled here (must be shared scratch if workers run on other nodes).
+# Kept outside uploads/ – that directory is served publicly at /uploads.
+CHUNK_DIR = "scratch/chunks"
+os.makedirs(CHUNK_DIR, exist_ok=True)
+
+
+async def _admit(allow_reject: bool = True) -> int:
+    """Job priority for a new answer, or 503 + Retry-After when the analysis queue is full."""
+    try:
+        return await admit_job(allow_reject=allow_reject)
+    except AdmissionRejected as e:
+        print("[Backend 🎤] Video: Workers busy –", e.pending, "jobs pending – 503, thodi der baad try karo!")
+        raise HTTPException(
+            status_code=503,
+            detail="Answer analysis is at capacity, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
+async def _queue_spooled_answer(
+    interview_id: str,
+    question_id: str,
+    upload_id: str,
+    spool_path: str,
+    priority: int,
+) -> str:
+    """
+    Queue analysis on the local spool copy right away, plus the storage upload as its own
+    job (store_video) – the stored copy is only the fallback source for workers.
+    """
+    job_id = await enqueue_job(
+        PROCESS_ANSWER_JOB,
+        {
+            "interview_id": interview_id,
+            "question_id": question_id,
+            "video_url": None,  # not in storage yet – worker reads it from the answer if needed
+            "local_path": spool_path,
+            "upload_id": upload_id,
+        },
+        priority=priority,
+    )
+    await db.interview_answers.update_one(
+        {"session_id": interview_id, "question_id": question_id, "upload_id": upload_id},
+        {"$set": {"status": "queued", "job_id": job_id, "deferred": priority != JOB_PRIORITY_NORMAL}},
+    )
+    await enqueue_job(
+        STORE_VIDEO_JOB,
+        {
+            "interview_id": interview_id,
+            "question_id": question_id,
+            "upload_id": upload_id,
+            "spool_path": spool_path,
+        },
+        priority=priority,
+    )
+    return job_id
 
 
 @router.post("/{interview_id}/questions/{question_id}/upload-video")
 async def upload_video(
-    background_tasks: BackgroundTasks,
     interview_id: str,
     question_id: str,
     video: UploadFile = File(...),
@@ -53,43 +114,226 @@ async def upload_video(
         raise HTTPException(status_code=404, detail="Question not found")
     print("[Backend 🎤] Video: Question bhi sahi – ab video file save karenge!")
 
-    # 3️⃣ Upload directly to Cloudinary
-    result = cloudinary.uploader.upload(
-        video.file,
-        resource_type="video",
-        folder=f"ai-interview/interviews/{interview_id}"
-    )
+    # 3️⃣ Admission control – checked before the upload so a rejected client can resend
+    priority = await _admit()
 
-    video_url = result["secure_url"]
-    public_id = result["public_id"]
+    # 4️⃣ Spool to local disk – analysis starts from this copy, no storage round-trip
+    upload_id = uuid.uuid4().hex
+    ext = os.path.splitext(video.filename or "")[1] or ".webm"
+    spool_path = spool_path_for(upload_id, ext)
+    with open(spool_path, "wb") as f:
+        while chunk := await video.read(1024 * 1024):
+            f.write(chunk)
 
-    print("[Backend 🎤] Video: File disk pe save ho gaya –", video_url)
-    logger.info("Video saved: %s", video_url)
+    print("[Backend 🎤] Video: File disk pe save ho gaya –", spool_path)
+    logger.info("Video spooled: %s", spool_path)
 
-    # 4️⃣ Create/update answer record (idempotent for retries)
+    # 5️⃣ Create/update answer record (idempotent for retries)
     await db.interview_answers.update_one(
         {"session_id": interview_id, "question_id": question_id},
         {"$set": {
-            "video_path": video_url,
-            "video_public_id": public_id,
+            "upload_id": upload_id,
+            "spool_path": spool_path,
+            "spool_holders": SPOOL_HOLDERS,
+            "storage_status": "pending",
             "status": "uploaded",
             "created_at": datetime.utcnow()
-        }},
+        },
+        "$unset": {"partial_transcript": "", "checkpoint": "", "video_path": "", "video_public_id": ""}},
         upsert=True
     )
     print("[Backend 🎤] Video: Answer record DB mein daal diya – status = uploaded")
 
-    # 5️⃣ 🔥 BACKGROUND TASK
-    background_tasks.add_task(
-        process_answer_pipeline,
-        interview_id,
-        question_id,
-        video_url,
+    # 6️⃣ 🔥 Queue the analysis job – a worker (python -m app.worker) picks it up;
+    #    storage upload (Cloudinary by default) is queued as its own job
+    job_id = await _queue_spooled_answer(interview_id, question_id, upload_id, spool_path, priority)
+    print("[Backend 🎤] Video: Analysis job queue mein daal diya – worker transcript + emotion + score karega!")
+    print("[Backend 🎤] Video: Report tab milega jab worker pipeline complete karega – worker terminal mein BackgroundJob prints dekh lo!")
+
+    logger.info("Analysis job enqueued | job=%s", job_id)
+    return {
+        "message": "Video uploaded successfully. Processing started."
+    }
+
+
+@router.post("/{interview_id}/questions/{question_id}/upload-chunk")
+async def upload_chunk(
+    interview_id: str,
+    question_id: str,
+    index: int = Form(...),
+    final: bool = Form(False),
+    chunk: UploadFile = File(...),
+    current_user=Depends(get_current_user)
+):
+    """
+    Progressive upload: send MediaRecorder chunks (index 0, 1, 2, ...) while the candidate
+    is still speaking. Audio received so far is transcribed in the background, so when the
+    `final` chunk lands only the tail is left and scoring starts within seconds.
+    """
+    print("[Backend 🎤] Video: Chunk aaya – question =", question_id, "index =", index, "final =", final)
+    logger.info(
+        "VIDEO CHUNK | interview=%s | question=%s | index=%s | final=%s",
+        interview_id, question_id, index, final
+    )
+
+    # 1️⃣ Validate interview ownership + question
+    session = await db.interview_sessions.find_one({
+        "_id": ObjectId(interview_id),
+        "user_id": str(current_user["_id"])
+    })
+    if not session:
+        print("[Backend 🎤] Video: Session nahi mila – 404!")
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    question = await db.interview_questions.find_one({
+        "_id": ObjectId(question_id),
+        "session_id": interview_id
+    })
+    if not question:
+        print("[Backend 🎤] Video: Question nahi mila – 404!")
+        raise HTTPException(status_code=404, detail="Question not found")
+
+    recording_path = os.path.join(CHUNK_DIR, f"{interview_id}_{question_id}.webm")
+    answer_filter = {"session_id": interview_id, "question_id": question_id}
+
+    # 2️⃣ Chunks must arrive in order; index 0 starts a fresh recording
+    if index == 0:
+        # Admission is decided up front – once recording started the answer is never rejected
+        await _admit()
+        if os.path.exists(recording_path):
+            os.remove(recording_path)
+        await db.interview_answers.update_one(
+            answer_filter,
+            {"$set": {
+                "status": "recording",
+                "chunks_received": 0,
+                "recording_bytes": 0,
+                "partial_transcript": {"processed_until": 0.0, "segments": []},
+                "created_at": datetime.utcnow()
+            },
+            "$unset": {"transcript": "", "emotion": "", "confidence": "", "score": "", "feedback": "", "error": "", "checkpoint": ""}},
+            upsert=True
+        )
+
+    # 3️⃣ Claim the index (and its byte range) before writing – a duplicate request that
+    #    loses the claim never touches the file, and the winner writes at its own offset
+    data = await chunk.read()
+    claimed = await db.interview_answers.find_one_and_update(
+        {**answer_filter, "status": "recording", "chunks_received": index},
+        {"$inc": {"chunks_received": 1, "recording_bytes": len(data)}},
+        return_document=ReturnDocument.BEFORE,
     )
-    print("[Backend 🎤] Video: Background pipeline queue mein daal diya – transcript + emotion + score hoga!")
-    print("[Backend 🎤] Video: Report tab milega jab ye pipeline complete ho jayega – terminal mein BackgroundJob prints dekh lo!")
+    if not claimed:
+        answer = await db.interview_answers.find_one(answer_filter)
+        if not answer or answer.get("status") != "recording":
+            raise HTTPException(status_code=409, detail="No recording in progress – start with chunk index 0")
+        expected = answer.get("chunks_received", 0)
+        if index < expected:
+            # Client retry of a chunk we already have
+            return {"message": "Chunk already received", "next_index": expected}
+        raise HTTPException(status_code=409, detail=f"Expected chunk index {expected}")
+
+    offset = claimed.get("recording_bytes", 0)
+    try:
+        fd = os.open(recording_path, os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            os.pwrite(fd, data, offset)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Hand the index back so the client's retry is written instead of skipped
+        await db.interview_answers.update_one(
+            {**answer_filter, "status": "recording", "chunks_received": index + 1},
+            {"$inc": {"chunks_received": -1, "recording_bytes": -len(data)}}
+        )
+        raise
 
-    logger.info("Background processing scheduled")
+    if not final:
+        # 4️⃣ Transcribe what we have so far (one queued job per answer is enough)
+        await enqueue_job(
+            TRANSCRIBE_SEGMENT_JOB,
+            {
+                "interview_id": interview_id,
+                "question_id": question_id,
+                "recording_path": recording_path,
+            },
+            dedupe_key=f"segment:{interview_id}:{question_id}",
+        )
+        return {"message": "Chunk received", "next_index": index + 1}
+
+    # 5️⃣ Final chunk: the assembled recording becomes the spool copy (a new recording
+    #    for this question can start at chunk 0 without touching it)
+    upload_id = uuid.uuid4().hex
+    spool_path = spool_path_for(upload_id)
+    os.replace(recording_path, spool_path)
+    print("[Backend 🎤] Video: Saare chunks aa gaye – recording spool mein –", spool_path)
+
+    await db.interview_answers.update_one(
+        answer_filter,
+        {"$set": {
+            "upload_id": upload_id,
+            "spool_path": spool_path,
+            "spool_holders": SPOOL_HOLDERS,
+            "storage_status": "pending",
+            "status": "uploaded"
+        },
+        "$unset": {"video_path": "", "video_public_id": ""}}
+    )
+    priority = await _admit(allow_reject=False)
+    job_id = await _queue_spooled_answer(interview_id, question_id, upload_id, spool_path, priority)
+
+    logger.info("Chunked upload complete, analysis job enqueued | job=%s", job_id)
     return {
         "message": "Video uploaded successfully. Processing started."
     }
+
+
+@router.post("/{interview_id}/questions/{question_id}/retry-analysis")
+async def retry_analysis(
+    interview_id: str,
+    question_id: str,
+    current_user=Depends(get_current_user)
+):
+    """
+    Re-queue a failed answer (e.g. the LLM provider was down for all job attempts).
+    Stages that already finished are checkpointed, so the retry resumes where it stopped.
+    """
+    session = await db.interview_sessions.find_one({
+        "_id": ObjectId(interview_id),
+        "user_id": str(current_user["_id"])
+    })
+    if not session:
+        raise HTTPException(status_code=404, detail="Interview not found")
+
+    answer_filter = {"session_id": interview_id, "question_id": question_id}
+    answer = await db.interview_answers.find_one(answer_filter)
+    if not answer or not (answer.get("video_path") or answer.get("spool_path")):
+        raise HTTPException(status_code=404, detail="Answer not found")
+    if answer.get("status") != "failed":
+        raise HTTPException(status_code=409, detail=f"Answer is {answer.get('status')}, only failed answers can be retried")
+
+    payload = {
+        "interview_id": interview_id,
+        "question_id": question_id,
+        "video_url": answer.get("video_path"),
+        "upload_id": answer.get("upload_id"),
+    }
+    # The spool copy is kept until the pipeline succeeds
+    if answer.get("spool_path") and os.path.exists(answer["spool_path"]):
+        payload["local_path"] = answer["spool_path"]
+
+    priority = await _admit()
+    job_id = await enqueue_job(PROCESS_ANSWER_JOB, payload, priority=priority)
+    await db.interview_answers.update_one(
+        answer_filter,
+        {"$set": {"status": "queued", "job_id": job_id, "deferred": priority != JOB_PRIORITY_NORMAL},
+         "$unset": {"error": ""}}
+    )
+
+    checkpoint = answer.get("checkpoint") or {}
+    if checkpoint.get("source") != (answer.get("upload_id") or answer.get("video_path")):
+        checkpoint = {}
+    resumes_from = "scoring" if "transcript" in checkpoint and "emotion" in checkpoint else "analysis"
+    print("[Backend 🎤] Video: Failed answer dobara queue mein – resume from", resumes_from)
+    logger.info("Analysis retry enqueued | job=%s | resumes_from=%s", job_id, resumes_from)
+    return {"message": "Analysis re-queued", "resumes_from": resumes_from}
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+
+from app.core.database import db
+from app.core.security import required_role
+from app.core.logger import get_logger
+from app.services.llm_cache import cache_stats
+from app.services.llm_health import health_snapshot
+from app.services.llm_json import _provider_order, hedge_stats
+from app.services.pipeline_metrics import STAGES, summarize_timings
+
+logger = get_logger(__name__)
+
+# Operational data (all users' answers, provider state) – admins only
+METRICS_ROLE = "admin"
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Pipeline Metrics"],
+    dependencies=[Depends(required_role(METRICS_ROLE))],
+)
+
+# Upper bound on answers scanned per request – percentiles are computed in Python
+MAX_SAMPLES = 20000
+
+
+@router.get("/pipeline")
+async def pipeline_stage_percentiles(
+    hours: float = Query(24, gt=0, le=24 * 90, description="Time window, ending now"),
+    status: Optional[str] = Query(None, description="Only answers with this status (completed / failed)"),
+    worker_id: Optional[str] = Query(None, description="Only answers processed by this worker"),
+):
+    """Per-stage latency percentiles of the answer pipeline over the last `hours`."""
+    since = datetime.utcnow() - timedelta(hours=hours)
+    query = {"timings.finished_at": {"$gte": since}}
+    if status:
+        query["status"] = status
+    if worker_id:
+        query["timings.worker_id"] = worker_id
+
+    print("[Backend 🎤] Metrics: Pipeline timings ka hisaab – last", hours, "ghante!")
+    docs = await db.interview_answers.find(query, {"timings": 1}).sort(
+        "timings.finished_at", -1
+    ).to_list(length=MAX_SAMPLES)
+    timings = [doc.get("timings") for doc in docs]
+    logger.info("Pipeline metrics | window=%sh | answers=%d", hours, len(timings))
+
+    return {
+        "window_hours": hours,
+        "since": since,
+        "answers": len(timings),
+        "truncated": len(timings) == MAX_SAMPLES,
+        "stage_order": list(STAGES),
+        "stages": summarize_timings(timings),
+        "workers": sorted({t.get("worker_id") for t in timings if t and t.get("worker_id")}),
+    }
+
+
+@router.get("/llm-providers")
+async def llm_provider_health():
+    """Circuit state, latency and hedging per LLM provider, plus LLM cache hit rate (this API process)."""
+    return {
+        "preferred_order": _provider_order(),
+        "providers": health_snapshot(),
+        "hedging": dict(hedge_stats),
+        "cache": dict(cache_stats),
+    }
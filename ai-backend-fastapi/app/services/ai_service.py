@@ -1,17 +1,18 @@
 from typing import Any, Dict, List, Optional
 
 from app.core.logger import get_logger
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async
 
 logger = get_logger(__name__)
 
 
-def analyze_resume_and_jd(resume_text: str, jd_text: str) -> dict:
-    print("[Backend 🎤] AIService: Resume + JD AI ko bhej rahe hain – questions maang rahe hain!")
-    logger.info("Starting AI resume-JD analysis")
+SYSTEM_PROMPT_JSON = "You are a JSON-only API. Do not return markdown."
+# LLM cache key component – bump when the resume/JD prompt or its JSON shape changes
+RESUME_JD_PROMPT_VERSION = "resume-jd-v1"
 
-    try:
-        prompt = f"""
+
+def _resume_jd_prompt(resume_text: str, jd_text: str) -> str:
+    return f"""
 Analyze this candidate for the given job description.
 
 RESUME:
@@ -35,32 +36,78 @@ Return STRICT JSON ONLY in this format:
 }}
 """
 
+
+RESUME_JD_KEYS = ["match_score", "strengths", "gaps", "questions"]
+
+
+def _require_resume_jd_keys(result: dict):
+    """Per-provider validation: an answer missing keys loses to the other provider."""
+    missing = [k for k in RESUME_JD_KEYS if k not in result]
+    if missing:
+        raise ValueError(f"Malformed AI response, missing: {missing}")
+
+
+def _check_resume_jd_result(result: dict) -> dict:
+    print("[Backend 🎤] AIService: AI ne JSON de diya – ab keys check karte hain!")
+
+    if not all(k in result for k in RESUME_JD_KEYS):
+        print("[Backend 🎤] AIService: Arre AI ne saari keys nahi bheji –", list(result.keys()))
+        logger.error("AI response missing keys: %s", result.keys())
+        raise ValueError("Malformed AI response")
+
+    print(
+        "[Backend 🎤] AIService: Sab sahi – match_score =",
+        result["match_score"],
+        "questions =",
+        len(result["questions"]),
+    )
+    logger.info(
+        "AI analysis complete | match_score=%s | questions=%d",
+        result["match_score"],
+        len(result["questions"]),
+    )
+    return result
+
+
+def analyze_resume_and_jd(resume_text: str, jd_text: str) -> dict:
+    print("[Backend 🎤] AIService: Resume + JD AI ko bhej rahe hain – questions maang rahe hain!")
+    logger.info("Starting AI resume-JD analysis")
+
+    try:
         print("[Backend 🎤] AIService: AI provider ko prompt bhej rahe hain – wait karo!")
         result = generate_json(
-            system_prompt="You are a JSON-only API. Do not return markdown.",
-            user_prompt=prompt,
+            system_prompt=SYSTEM_PROMPT_JSON,
+            user_prompt=_resume_jd_prompt(resume_text, jd_text),
             temperature=0.2,
+            prompt_version=RESUME_JD_PROMPT_VERSION,
+            validate=_require_resume_jd_keys,
         )
-        print("[Backend 🎤] AIService: AI ne JSON de diya – ab keys check karte hain!")
-
-        required_keys = ["match_score", "strengths", "gaps", "questions"]
-        if not all(k in result for k in required_keys):
-            print("[Backend 🎤] AIService: Arre AI ne saari keys nahi bheji –", list(result.keys()))
-            logger.error("AI response missing keys: %s", result.keys())
-            raise ValueError("Malformed AI response")
-
-        print(
-            "[Backend 🎤] AIService: Sab sahi – match_score =",
-            result["match_score"],
-            "questions =",
-            len(result["questions"]),
-        )
-        logger.info(
-            "AI analysis complete | match_score=%s | questions=%d",
-            result["match_score"],
-            len(result["questions"]),
+        return _check_resume_jd_result(result)
+
+    except Exception as e:
+        print("[Backend 🎤] AIService: AI call fail –", str(e))
+        logger.exception("AI analysis failed")
+        raise
+
+
+async def analyze_resume_and_jd_async(resume_text: str, jd_text: str) -> dict:
+    """
+    analyze_resume_and_jd() for async handlers – doesn't block the event loop. The candidate
+    waits on this during setup-ai, so the call is hedged across providers.
+    """
+    print("[Backend 🎤] AIService: Resume + JD AI ko bhej rahe hain (async) – questions maang rahe hain!")
+    logger.info("Starting AI resume-JD analysis (async)")
+
+    try:
+        result = await generate_json_async(
+            system_prompt=SYSTEM_PROMPT_JSON,
+            user_prompt=_resume_jd_prompt(resume_text, jd_text),
+            temperature=0.2,
+            hedge=True,
+            validate=_require_resume_jd_keys,
+            prompt_version=RESUME_JD_PROMPT_VERSION,
         )
-        return result
+        return _check_resume_jd_result(result)
 
     except Exception as e:
         print("[Backend 🎤] AIService: AI call fail –", str(e))
@@ -130,7 +177,7 @@ Return STRICT JSON ONLY:
 
     try:
         result = generate_json(
-            system_prompt="You are a JSON-only API. Do not return markdown.",
+            system_prompt=SYSTEM_PROMPT_JSON,
             user_prompt=prompt,
             temperature=0.2,
         )
@@ -0,0 +1,63 @@
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ASCENDING
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_COLLECTION = "analysis_cache"
+
+
+def ensure_cache_indexes():
+    """TTL index so cached results expire after ANALYSIS_CACHE_TTL_DAYS."""
+    get_sync_db()[CACHE_COLLECTION].create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=settings.ANALYSIS_CACHE_TTL_DAYS * 24 * 3600,
+    )
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(kind: str, content_hash: str, engine_version: str) -> str:
+    """kind = "transcript" | "emotion"; engine_version changes whenever the output would."""
+    return f"{kind}:{content_hash}:{engine_version}"
+
+
+def get_cached(key: str) -> Optional[Dict[str, Any]]:
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return None
+    try:
+        doc = get_sync_db()[CACHE_COLLECTION].find_one({"_id": key})
+    except Exception:
+        logger.exception("Analysis cache lookup failed: %s", key)
+        return None
+    if doc:
+        print("[Backend 🎤] AnalysisCache: Cache hit –", key.split(":")[0], "dobara compute nahi karna!")
+        logger.info("Analysis cache hit: %s", key)
+        return doc["value"]
+    return None
+
+
+def put_cached(key: str, value: Dict[str, Any]):
+    if not settings.ANALYSIS_CACHE_ENABLED:
+        return
+    try:
+        get_sync_db()[CACHE_COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {"value": value, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+    except Exception:
+        # Cache is best-effort – never fail the pipeline because of it
+        logger.exception("Analysis cache write failed: %s", key)
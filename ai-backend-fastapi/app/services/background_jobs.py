@@ -1,61 +1,294 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import Callable, Optional, Tuple
 
 from bson import ObjectId
 
-import requests
 import os
 
 
+from app.core.config import settings
 from app.core.database_sync import get_sync_db
 from app.core.logger import get_logger
 from app.services.scoring_service import score_answer
-from app.services.video_analysis_service import analyze_emotion, extract_audio, transcribe_audio
+from app.services.video_download import download_video
+from app.services.incremental_transcription import finish_transcript, transcribe_pending_audio
+from app.services.analysis_cache import cache_key, file_sha256, get_cached, put_cached
+from app.services.pipeline_metrics import StageTimer
+from app.services.upload_spool import HOLDER_ANALYSIS, release_spool
+from app.services.video_analysis_service import (
+    analyze_emotion,
+    classify_emotion_frames,
+    decode_audio_and_frames,
+    decode_audio_samples,
+    decode_samples_and_frames,
+    emotion_version,
+    extract_audio,
+    transcript_version,
+    transcribe_audio,
+)
 
 logger = get_logger(__name__)
 
+# Workers run without the API routers, so create scratch dirs here too
+os.makedirs("uploads/audio", exist_ok=True)
 
-def process_answer_pipeline(interview_id: str, question_id: str, video_url: str):
+# Bounded pool shared by all jobs in this worker process. Whisper (torch) and
+# DeepFace (TensorFlow) release the GIL inside their kernels, so the two stages overlap.
+_stage_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.PIPELINE_STAGE_THREADS),
+    thread_name_prefix="pipeline-stage",
+)
+
+
+def _transcribe_and_cleanup(audio_path: str, language=None) -> str:
+    try:
+        return transcribe_audio(audio_path, language=language)
+    finally:
+        if os.path.exists(audio_path):
+            os.remove(audio_path)  # clean up audio file
+
+
+def _analyze_video(
+    video_path: str,
+    question_id: str,
+    language=None,
+    transcript=None,
+    timer: Optional[StageTimer] = None,
+    emotion_result: Optional[Tuple[str, str]] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+):
+    """
+    Transcript + emotion for one answer video. Results are cached by content hash and
+    engine version, so identical re-uploads and bulk reprocessing skip the ML work.
+    A `transcript` / `emotion_result` the caller already has (incremental transcript,
+    checkpoint of an earlier attempt) is used as-is; everything else is passed to
+    `on_result` as soon as it is available.
+    Stage durations go into `timer` (stages served from cache are not recorded).
+    """
+    timer = timer or StageTimer()
+    report = on_result or (lambda values: None)
+    transcript_given, emotion_given = transcript is not None, emotion_result is not None
+    content_hash = file_sha256(video_path)
+    transcript_key = cache_key("transcript", content_hash, transcript_version(language))
+    emotion_key = cache_key("emotion", content_hash, emotion_version())
+
+    cached_transcript = {"transcript": transcript} if transcript is not None else get_cached(transcript_key)
+    if emotion_given:
+        cached_emotion = {"emotion": emotion_result[0], "confidence": emotion_result[1]}
+    else:
+        cached_emotion = get_cached(emotion_key)
+    audio_path = f"uploads/audio/{question_id}.wav"
+
+    if cached_transcript is None and cached_emotion is None:
+        # 1️⃣ Decode once: audio + sampled frames
+        print("[Backend 🎤] BackgroundJob: Step 1 – video ek baar decode – audio + frames!")
+        with timer.stage("decode"):
+            if settings.AUDIO_IN_MEMORY:
+                samples, frames = decode_samples_and_frames(video_path)
+            else:
+                frames = decode_audio_and_frames(video_path, audio_path)
+
+        # 2️⃣ + 3️⃣ Transcript and emotion don't depend on each other – run them together
+        print("[Backend 🎤] BackgroundJob: Step 2+3 – Whisper transcript aur DeepFace emotion saath mein!")
+        if settings.AUDIO_IN_MEMORY:
+            transcript_future = _stage_executor.submit(timer.timed, "transcribe", transcribe_audio, samples, language)
+        else:
+            transcript_future = _stage_executor.submit(timer.timed, "transcribe", _transcribe_and_cleanup, audio_path, language)
+        emotion_future = _stage_executor.submit(timer.timed, "emotion", classify_emotion_frames, frames)
+
+        # Join before scoring – score_answer needs both. If one stage fails, keep the
+        # other's result so the retry only redoes the failed stage.
+        wait([transcript_future, emotion_future])
+        if transcript_future.exception() is None:
+            report({"transcript": transcript_future.result()})
+        if emotion_future.exception() is None:
+            report(dict(zip(("emotion", "confidence"), emotion_future.result())))
+        transcript = transcript_future.result()
+        emotion, confidence = emotion_future.result()
+        transcript_given = emotion_given = True  # already reported
+    elif cached_transcript is None:
+        print("[Backend 🎤] BackgroundJob: Emotion cache se – sirf transcript banayenge!")
+        if settings.AUDIO_IN_MEMORY:
+            with timer.stage("decode"):
+                samples = decode_audio_samples(video_path)
+            transcript = timer.timed("transcribe", transcribe_audio, samples, language)
+        else:
+            with timer.stage("decode"):
+                extract_audio(video_path, audio_path)
+            transcript = timer.timed("transcribe", _transcribe_and_cleanup, audio_path, language)
+        emotion, confidence = cached_emotion["emotion"], cached_emotion["confidence"]
+    elif cached_emotion is None:
+        print("[Backend 🎤] BackgroundJob: Transcript cache se – sirf emotion dekhenge!")
+        transcript = cached_transcript["transcript"]
+        # Decoding is streamed into classification here, so it counts as emotion time
+        emotion, confidence = timer.timed("emotion", analyze_emotion, video_path)
+    else:
+        transcript = cached_transcript["transcript"]
+        emotion, confidence = cached_emotion["emotion"], cached_emotion["confidence"]
+
+    if not transcript_given:
+        report({"transcript": transcript})
+    if not emotion_given:
+        report({"emotion": emotion, "confidence": confidence})
+
+    if cached_transcript is None:
+        put_cached(transcript_key, {"transcript": transcript})
+    if cached_emotion is None:
+        put_cached(emotion_key, {"emotion": emotion, "confidence": confidence})
+
+    return transcript, emotion, confidence
+
+
+def _load_checkpoint(answer: Optional[dict], video_url: str) -> dict:
+    """Stage outputs saved by an earlier attempt on the same upload (see _save_checkpoint)."""
+    checkpoint = (answer or {}).get("checkpoint") or {}
+    if checkpoint.get("source") != video_url:
+        return {}  # left over from a previous upload of this answer
+    return checkpoint
+
+
+def _save_checkpoint(db, interview_id: str, question_id: str, video_url: str, values: dict):
+    """
+    Persist finished stage outputs on the answer so a retry resumes after them.
+    Never overwrites a checkpoint that belongs to a newer upload.
     """
-    FULL BACKGROUND PIPELINE
+    db.interview_answers.update_one(
+        {
+            "session_id": interview_id,
+            "question_id": question_id,
+            "$or": [{"checkpoint": {"$exists": False}}, {"checkpoint.source": video_url}],
+        },
+        {"$set": {
+            "checkpoint.source": video_url,
+            "checkpoint.updated_at": datetime.utcnow(),
+            **{f"checkpoint.{key}": value for key, value in values.items()},
+        }},
+    )
+    print("[Backend 🎤] BackgroundJob: Checkpoint save –", ", ".join(values), "– retry yahin se shuru hoga!")
+    logger.info("Checkpoint saved | question=%s | %s", question_id, list(values))
+
+
+def _session_language(db, interview_id: str):
+    session = db.interview_sessions.find_one({"_id": ObjectId(interview_id)}, {"language": 1})
+    return (session or {}).get("language")
+
+
+def transcribe_segment_job(interview_id: str, question_id: str, recording_path: str):
+    """Chunked upload in progress: transcribe the audio received so far (see incremental_transcription)."""
+    if not os.path.exists(recording_path):
+        logger.warning("Recording gone, skipping segment | question=%s", question_id)
+        return
+    transcribe_pending_audio(interview_id, question_id, recording_path, language=_session_language(get_sync_db(), interview_id))
+
+
+def _timings_doc(timer: StageTimer, job_meta: dict) -> dict:
+    timings = timer.as_doc(
+        worker_id=job_meta.get("worker_id"),
+        job_id=job_meta.get("job_id"),
+        attempt=job_meta.get("attempt"),
+    )
+    logger.info("PIPELINE TIMINGS | %s", {k: v for k, v in timings.items() if k.endswith("_ms")})
+    return timings
+
+
+def process_answer_pipeline(
+    interview_id: str,
+    question_id: str,
+    video_url: Optional[str],
+    local_path: Optional[str] = None,
+    job_meta: Optional[dict] = None,
+    upload_id: Optional[str] = None,
+):
+    """
+    FULL BACKGROUND PIPELINE (runs on an analysis worker, see app.worker)
     video -> audio -> transcript -> emotion -> scoring
+    Transcript and emotion are checkpointed on the answer as they finish, so a retry
+    (e.g. after an LLM provider error) resumes from the first incomplete stage.
+    `local_path`: spooled upload on (shared) scratch – no download needed. Object storage
+    (`video_url`, or the answer's `video_path` once the background upload finished) is
+    only the fallback when this worker can't see the spool file.
+    `upload_id`: identifies the upload the checkpoint belongs to.
+    `job_meta`: job_id / worker_id / attempt / queue_wait_ms, stored with the stage timings.
     """
+    timer = StageTimer()
+    job_meta = job_meta or {}
+    if job_meta.get("queue_wait_ms") is not None:
+        timer.record("queue_wait", job_meta["queue_wait_ms"])
     print("[Backend 🎤] BackgroundJob: Pipeline shuru – interview =", interview_id, "question =", question_id)
     logger.info("BG JOB STARTED | interview=%s | question=%s", interview_id, question_id)
 
     db = get_sync_db()
 
+    # Every write is scoped to this upload – a retry of an older upload must never touch
+    # the answer once the candidate re-uploaded
+    answer_filter = {"session_id": interview_id, "question_id": question_id}
+    if upload_id:
+        answer_filter["upload_id"] = upload_id
+
     # Mark as processing immediately so downstream status/report APIs can see work started.
-    db.interview_answers.update_one(
-        {"session_id": interview_id, "question_id": question_id},
+    marked = db.interview_answers.update_one(
+        answer_filter,
         {"$set": {"status": "processing", "processing_started_at": datetime.utcnow()}},
     )
+    if upload_id and marked.matched_count == 0:
+        print("[Backend 🎤] BackgroundJob: Naya upload aa chuka hai – purana job skip!")
+        logger.info("Stale upload, skipping | question=%s | upload=%s", question_id, upload_id)
+        if local_path:
+            release_spool(interview_id, question_id, local_path, HOLDER_ANALYSIS)
+        return
 
-    # 🔽 Step 0: Download video from Cloudinary temporarily
+    # 🔽 Step 0: Use the spooled upload; download from storage only as a fallback
     temp_video_path = f"uploads/temp_{question_id}.mp4"
+    checkpoint_source = upload_id or video_url
 
     try:
-        response = requests.get(video_url)
-        with open(temp_video_path, "wb") as f:
-            f.write(response.content)
-    except Exception as e:
-        raise Exception(f"Failed to download video from Cloudinary: {str(e)}")
-    
-    try:
-        # 1️⃣ Extract audio
-        audio_path = f"uploads/audio/{question_id}.wav"
-        print("[Backend 🎤] BackgroundJob: Step 1 – video se audio nikal rahe hain!")
-        extract_audio(temp_video_path, audio_path)
+        if local_path and os.path.exists(local_path):
+            temp_video_path = local_path
 
-        # 2️⃣ Transcribe audio
-        print("[Backend 🎤] BackgroundJob: Step 2 – Whisper se transcript!")
-        transcript = transcribe_audio(audio_path)
+        answer = db.interview_answers.find_one(
+            answer_filter,
+            {"partial_transcript": 1, "checkpoint": 1, "video_path": 1},
+        )
+        checkpoint = _load_checkpoint(answer, checkpoint_source)
+        transcript = checkpoint.get("transcript")
+        emotion_result = (checkpoint["emotion"], checkpoint["confidence"]) if "emotion" in checkpoint else None
 
-        if os.path.exists(audio_path):
-            os.remove(audio_path)  # clean up audio file
+        def save_checkpoint(values: dict):
+            _save_checkpoint(db, interview_id, question_id, checkpoint_source, values)
+
+        if transcript is not None and emotion_result is not None:
+            # Earlier attempt got past analysis – no download, no ML, straight to scoring
+            print("[Backend 🎤] BackgroundJob: Checkpoint mila – transcript + emotion ready, seedha scoring!")
+            logger.info("Resuming from checkpoint at scoring | question=%s", question_id)
+            emotion, confidence = emotion_result
+        else:
+            if temp_video_path != local_path:
+                video_url = video_url or (answer or {}).get("video_path")
+                if not video_url:
+                    # Spool not visible here and the background storage upload isn't done – retry later
+                    raise Exception("Video not available yet: local upload not found and not in storage yet")
+                print("[Backend 🎤] BackgroundJob: Local copy nahi mili – storage se download!")
+                try:
+                    with timer.stage("download"):
+                        download_video(video_url, temp_video_path)
+                except Exception as e:
+                    raise Exception(f"Failed to download video from storage: {str(e)}")
+
+            language = _session_language(db, interview_id)
 
-        # 3️⃣ Emotion analysis
-        print("[Backend 🎤] BackgroundJob: Step 3 – DeepFace se emotion!")
-        emotion, confidence = analyze_emotion(temp_video_path)
+            # Chunked upload: most of the transcript was built while the candidate spoke
+            if transcript is None and answer and answer.get("partial_transcript"):
+                print("[Backend 🎤] BackgroundJob: Incremental transcript mila – sirf aakhri hissa transcribe karenge!")
+                transcript = timer.timed(
+                    "transcribe", finish_transcript, interview_id, question_id, temp_video_path, language=language
+                )
+                save_checkpoint({"transcript": transcript})
+
+            # 1️⃣ - 3️⃣ Transcript + emotion (cached by video content hash)
+            transcript, emotion, confidence = _analyze_video(
+                temp_video_path, question_id, language, transcript, timer, emotion_result, save_checkpoint
+            )
 
         # 4️⃣ Fetch question
         question = db.interview_questions.find_one({"_id": ObjectId(question_id)})
@@ -66,17 +299,18 @@ def process_answer_pipeline(interview_id: str, question_id: str, video_url: str)
         print("[Backend 🎤] BackgroundJob: Step 4 – question mil gaya, ab score maangenge!")
 
         # 5️⃣ Score answer
-        score = score_answer(
-            question["question_text"],
-            transcript,
-            emotion,
-            confidence,
-        )
+        with timer.stage("score"):
+            score = score_answer(
+                question["question_text"],
+                transcript,
+                emotion,
+                confidence,
+            )
         print("[Backend 🎤] BackgroundJob: Step 5 – GPT ne score de diya!")
 
         # 6️⃣ Save transcript/emotion/score
         db.interview_answers.update_one(
-            {"session_id": interview_id, "question_id": question_id},
+            answer_filter,
             {
                 "$set": {
                     "transcript": transcript,
@@ -95,14 +329,21 @@ def process_answer_pipeline(interview_id: str, question_id: str, video_url: str)
 
         # 7️⃣ Mark answer fully completed
         db.interview_answers.update_one(
-            {"session_id": interview_id, "question_id": question_id},
-            {"$set": {"status": "completed", "completed_at": datetime.utcnow()}},
+            answer_filter,
+            {"$set": {
+                "status": "completed",
+                "completed_at": datetime.utcnow(),
+                "timings": _timings_doc(timer, job_meta),
+            },
+            "$unset": {"checkpoint": ""}},
         )
 
-        # 🧹 Clean up temporary file
-        if os.path.exists(temp_video_path):
+        # 🧹 Clean up: our download, and our claim on the spooled upload (the storage
+        #    uploader may still be reading it – last one out deletes it)
+        if temp_video_path != local_path and os.path.exists(temp_video_path):
             os.remove(temp_video_path)
-
+        if local_path:
+            release_spool(interview_id, question_id, local_path, HOLDER_ANALYSIS)
 
         print("[Backend 🎤] BackgroundJob: Pipeline complete! 🎉")
         logger.info("BG JOB COMPLETED | interview=%s | question=%s", interview_id, question_id)
@@ -112,6 +353,8 @@ def process_answer_pipeline(interview_id: str, question_id: str, video_url: str)
         logger.exception("BG JOB FAILED")
 
         db.interview_answers.update_one(
-            {"session_id": interview_id, "question_id": question_id},
-            {"$set": {"status": "failed", "error": str(e)}},
-        )
\ No newline at end of file
+            answer_filter,
+            {"$set": {"status": "failed", "error": str(e), "timings": _timings_doc(timer, job_meta)}},
+        )
+        # Re-raise so the job queue can record the attempt and retry
+        raise
\ No newline at end of file
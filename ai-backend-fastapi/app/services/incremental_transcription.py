@@ -0,0 +1,107 @@
+"""
+Incremental transcription for answers uploaded in chunks (POST .../upload-chunk).
+
+While the candidate is still speaking, each new chunk is appended to a local
+recording and a segment job transcribes the audio received since the last
+segment, cutting at a pause so words are not split. When the final chunk lands
+only the short tail is left to transcribe.
+"""
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+from app.services.vad import FRAME_LEN, FRAME_MS, SAMPLE_RATE, speech_mask
+from app.services.video_analysis_service import decode_audio_samples, transcribe_audio
+
+logger = get_logger(__name__)
+
+
+def _choose_cut(samples, final: bool) -> Optional[int]:
+    """Sample index to cut the pending audio at, or None to wait for more audio."""
+    if final:
+        return len(samples)
+
+    pending = len(samples) / SAMPLE_RATE
+    if pending < settings.SEGMENT_MIN_SECONDS:
+        return None
+
+    limit = len(samples) - int(settings.SEGMENT_GUARD_SECONDS * SAMPLE_RATE)
+    min_pause = max(1, settings.SEGMENT_PAUSE_MS // FRAME_MS)
+
+    # Cut in the middle of the last pause that ends before the guard zone
+    is_speech = speech_mask(samples)
+    run_end = None
+    for i in range(min(len(is_speech), limit // FRAME_LEN) - 1, -1, -1):
+        if is_speech[i]:
+            if run_end is not None and run_end - i - 1 >= min_pause:
+                return ((i + 1 + run_end) // 2) * FRAME_LEN
+            run_end = None
+        elif run_end is None:
+            run_end = i + 1
+
+    if pending >= settings.SEGMENT_MAX_SECONDS:
+        return limit  # continuous speech – cut anyway rather than fall behind
+    return None
+
+
+def transcribe_pending_audio(
+    interview_id: str,
+    question_id: str,
+    recording_path: str,
+    final: bool = False,
+    language: Optional[str] = None,
+) -> dict:
+    """
+    Transcribe audio received since `partial_transcript.processed_until` and append it as a
+    segment. Concurrent runs are safe: the update only applies if nobody advanced the
+    offset in the meantime. Returns the (possibly unchanged) partial transcript state.
+
+    final=True must cover the recording to its end: if a segment job still running
+    advances the offset first, the tail is transcribed again from the new offset.
+    """
+    db = get_sync_db()
+    query = {"session_id": interview_id, "question_id": question_id}
+    while True:
+        answer = db.interview_answers.find_one(query, {"partial_transcript": 1})
+        state = (answer or {}).get("partial_transcript") or {"processed_until": 0.0, "segments": []}
+        start = float(state.get("processed_until", 0.0))
+
+        samples = decode_audio_samples(recording_path, start_seconds=start, allow_truncated=not final)
+        cut = _choose_cut(samples, final)
+        if not cut:
+            return state
+
+        text = transcribe_audio(samples[:cut], language=language)
+        end = start + cut / SAMPLE_RATE
+        segment = {"start": round(start, 3), "end": round(end, 3), "text": text}
+
+        result = db.interview_answers.update_one(
+            {**query, "partial_transcript.processed_until": state.get("processed_until", 0.0)},
+            {
+                "$push": {"partial_transcript.segments": segment},
+                "$set": {
+                    "partial_transcript.processed_until": end,
+                    "partial_transcript.updated_at": datetime.utcnow(),
+                },
+            },
+        )
+        if result.modified_count:
+            break
+
+        # Another job already transcribed (part of) this range – ours is discarded
+        logger.info("Segment %.1f-%.1fs already transcribed | question=%s | final=%s", start, end, question_id, final)
+        if not final:
+            return db.interview_answers.find_one(query, {"partial_transcript": 1}).get("partial_transcript") or state
+        print("[Backend 🎤] IncrementalTranscript: Segment job aage nikal gaya – tail dobara transcribe kar rahe hain!")
+
+    print("[Backend 🎤] IncrementalTranscript: Segment", round(start, 1), "-", round(end, 1), "s transcribe ho gaya!")
+    logger.info("Segment transcribed | question=%s | %.1f-%.1fs | %d chars", question_id, start, end, len(text))
+    return {**state, "processed_until": end, "segments": state.get("segments", []) + [segment]}
+
+
+def finish_transcript(interview_id: str, question_id: str, recording_path: str, language: Optional[str] = None) -> str:
+    """Transcribe the remaining tail and return the full transcript."""
+    state = transcribe_pending_audio(interview_id, question_id, recording_path, final=True, language=language)
+    return " ".join(seg["text"] for seg in state.get("segments", []) if seg.get("text")).strip()
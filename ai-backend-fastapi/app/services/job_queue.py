@@ -0,0 +1,258 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+JOBS_COLLECTION = "analysis_jobs"
+
+# Job kinds
+PROCESS_ANSWER_JOB = "process_answer"
+TRANSCRIBE_SEGMENT_JOB = "transcribe_segment"
+STORE_VIDEO_JOB = "store_video"
+
+# Job lifecycle: queued → running → completed | failed (retries go back to queued)
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Lower runs first. Deferred = accepted over the admission limit (see admit_job)
+JOB_PRIORITY_NORMAL = 0
+JOB_PRIORITY_DEFERRED = 10
+
+
+class AdmissionRejected(Exception):
+    """Too much work pending – the caller should retry after `retry_after` seconds."""
+
+    def __init__(self, pending: int, retry_after: int):
+        super().__init__(f"{pending} analysis jobs pending")
+        self.pending = pending
+        self.retry_after = retry_after
+
+
+def _new_job(kind: str, payload: Dict[str, Any], priority: int = JOB_PRIORITY_NORMAL) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "kind": kind,
+        "payload": payload,
+        "status": JOB_QUEUED,
+        "priority": priority,
+        "attempts": 0,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "available_at": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "last_error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def ensure_indexes():
+    """Indexes used by claim_job(). Safe to call on every worker start."""
+    db = get_sync_db()
+    db[JOBS_COLLECTION].create_index([("status", ASCENDING), ("priority", ASCENDING), ("available_at", ASCENDING)])
+    db[JOBS_COLLECTION].create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+    db[JOBS_COLLECTION].create_index([("dedupe_key", ASCENDING), ("status", ASCENDING)], sparse=True)
+
+
+async def admit_job(allow_reject: bool = True) -> int:
+    """
+    Admission control for new answer jobs, based on queued + running jobs.
+    Returns the priority to enqueue with, or raises AdmissionRejected when over
+    ADMISSION_MAX_PENDING_JOBS with ADMISSION_POLICY="reject" (and `allow_reject`).
+    """
+    from app.core.database import db
+
+    # Storage uploads ride along with every answer – count the answers, not them
+    pending = await db[JOBS_COLLECTION].count_documents({
+        "status": {"$in": [JOB_QUEUED, JOB_RUNNING]},
+        "kind": {"$ne": STORE_VIDEO_JOB},
+    })
+    if pending < settings.ADMISSION_MAX_PENDING_JOBS:
+        return JOB_PRIORITY_NORMAL
+
+    policy = (settings.ADMISSION_POLICY or "defer").strip().lower()
+    if policy == "reject" and allow_reject:
+        logger.warning("ADMISSION REJECTED | pending=%s", pending)
+        raise AdmissionRejected(pending, settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+    print("[Backend 🎤] JobQueue: Queue bhari hai –", pending, "jobs pending – ye job baad mein chalegi!")
+    logger.warning("ADMISSION DEFERRED | pending=%s", pending)
+    return JOB_PRIORITY_DEFERRED
+
+
+async def queue_position(job_id: str) -> Optional[int]:
+    """1-based position among runnable queued jobs (claim order), or None if not queued."""
+    from app.core.database import db
+
+    job = await db[JOBS_COLLECTION].find_one(
+        {"_id": ObjectId(job_id)}, {"status": 1, "priority": 1, "available_at": 1}
+    )
+    if not job or job.get("status") != JOB_QUEUED:
+        return None
+
+    priority = job.get("priority", JOB_PRIORITY_NORMAL)
+    ahead = await db[JOBS_COLLECTION].count_documents({
+        "status": JOB_QUEUED,
+        "$or": [
+            {"priority": {"$lt": priority}},
+            {"priority": priority, "available_at": {"$lt": job["available_at"]}},
+            {"priority": priority, "available_at": job["available_at"], "_id": {"$lt": job["_id"]}},
+        ],
+    })
+    return ahead + 1
+
+
+async def enqueue_job(
+    kind: str,
+    payload: Dict[str, Any],
+    dedupe_key: Optional[str] = None,
+    priority: int = JOB_PRIORITY_NORMAL,
+) -> str:
+    """
+    API side: store the job and return immediately. Workers pick it up.
+    With `dedupe_key`, at most one *queued* job exists per key – enqueueing again while
+    one is still waiting is a no-op (that job will see the newest data when it runs).
+    """
+    from app.core.database import db
+
+    job = _new_job(kind, payload, priority)
+    if dedupe_key:
+        # status/dedupe_key come from the query on insert
+        job.pop("status")
+        existing = await db[JOBS_COLLECTION].find_one_and_update(
+            {"dedupe_key": dedupe_key, "status": JOB_QUEUED},
+            {"$setOnInsert": job},
+            upsert=True,
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        logger.info("JOB ENQUEUED (dedupe) | kind=%s | job=%s", kind, existing["_id"])
+        return str(existing["_id"])
+
+    result = await db[JOBS_COLLECTION].insert_one(job)
+    print("[Backend 🎤] JobQueue: Job queue mein daal diya –", kind, "job_id =", result.inserted_id)
+    logger.info("JOB ENQUEUED | kind=%s | job=%s", kind, result.inserted_id)
+    return str(result.inserted_id)
+
+
+def claim_job(
+    worker_id: str,
+    on_dead: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Atomically lease the oldest runnable job, normal priority before deferred.
+    Runnable = queued and due, or running with an expired lease (worker died mid-job).
+    Jobs out of attempts are marked failed instead and passed to `on_dead` (dead letter).
+    """
+    db = get_sync_db()
+    while True:
+        now = datetime.utcnow()
+        job = db[JOBS_COLLECTION].find_one_and_update(
+            {
+                "$or": [
+                    {"status": JOB_QUEUED, "available_at": {"$lte": now}},
+                    {"status": JOB_RUNNING, "lease_expires_at": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "worker_id": worker_id,
+                    "claimed_at": now,
+                    "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("priority", ASCENDING), ("available_at", ASCENDING), ("_id", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is None:
+            return None
+
+        # A reclaimed lease also counts as an attempt – stop jobs that keep killing workers.
+        if job["attempts"] > job.get("max_attempts", settings.JOB_MAX_ATTEMPTS):
+            logger.error("JOB DEAD | job=%s | attempts=%s", job["_id"], job["attempts"])
+            job["last_error"] = job.get("last_error") or "lease expired too many times"
+            db[JOBS_COLLECTION].update_one(
+                {"_id": job["_id"], "worker_id": worker_id},
+                {"$set": {
+                    "status": JOB_FAILED,
+                    "last_error": job["last_error"],
+                    "finished_at": now,
+                    "updated_at": now,
+                }},
+            )
+            if on_dead is not None:
+                try:
+                    on_dead(job)
+                except Exception:
+                    logger.exception("Dead-letter hook failed | kind=%s | job=%s", job["kind"], job["_id"])
+            continue
+
+        logger.info("JOB CLAIMED | kind=%s | job=%s | attempt=%s", job["kind"], job["_id"], job["attempts"])
+        return job
+
+
+def heartbeat_job(job_id: ObjectId, worker_id: str) -> bool:
+    """Extend the lease. Returns False if the job is no longer owned by this worker."""
+    now = datetime.utcnow()
+    result = get_sync_db()[JOBS_COLLECTION].update_one(
+        {"_id": job_id, "status": JOB_RUNNING, "worker_id": worker_id},
+        {"$set": {
+            "lease_expires_at": now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            "heartbeat_at": now,
+            "updated_at": now,
+        }},
+    )
+    return result.modified_count == 1
+
+
+def complete_job(job_id: ObjectId, worker_id: str):
+    now = datetime.utcnow()
+    get_sync_db()[JOBS_COLLECTION].update_one(
+        {"_id": job_id, "worker_id": worker_id},
+        {"$set": {
+            "status": JOB_COMPLETED,
+            "lease_expires_at": None,
+            "finished_at": now,
+            "updated_at": now,
+        }},
+    )
+    logger.info("JOB COMPLETED | job=%s", job_id)
+
+
+def fail_job(job: Dict[str, Any], worker_id: str, error: str) -> bool:
+    """
+    Record a failed attempt. Requeues with exponential backoff while attempts remain.
+    Returns True if the job will be retried.
+    """
+    job["last_error"] = error[:2000]
+    now = datetime.utcnow()
+    attempts = job.get("attempts", 1)
+    will_retry = attempts < job.get("max_attempts", settings.JOB_MAX_ATTEMPTS)
+
+    update: Dict[str, Any] = {
+        "lease_expires_at": None,
+        "last_error": job["last_error"],
+        "updated_at": now,
+    }
+    if will_retry:
+        delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (attempts - 1))
+        update.update({"status": JOB_QUEUED, "available_at": now + timedelta(seconds=delay)})
+        logger.warning("JOB RETRY | job=%s | attempt=%s | in=%ss | err=%s", job["_id"], attempts, delay, error[:200])
+    else:
+        update.update({"status": JOB_FAILED, "finished_at": now})
+        logger.error("JOB FAILED | job=%s | attempts=%s | err=%s", job["_id"], attempts, error[:200])
+
+    get_sync_db()[JOBS_COLLECTION].update_one({"_id": job["_id"], "worker_id": worker_id}, {"$set": update})
+    return will_retry
@@ -0,0 +1,233 @@
+"""
+Response cache for generate_json() / generate_json_async().
+
+Identical prompts come back often (setup-ai re-run on the same resume + JD, re-scoring an
+unchanged transcript, bulk reprocessing). Responses are cached under a provider-independent
+key – hash of the whitespace-normalized prompts + temperature + the caller's prompt version –
+in two tiers: an in-process LRU (LLM_CACHE_MEMORY_ITEMS) and the shared Mongo `llm_cache`
+collection. Both expire after LLM_CACHE_TTL_HOURS. Only calls that pass a prompt_version
+are cached; bump the version whenever the prompt or the expected output changes.
+
+Size: an entry is the parsed JSON answer plus key, typically 1-5 KB (setup-ai answers
+are the largest). The TTL alone lets the collection grow with the number of unique
+prompts in LLM_CACHE_TTL_HOURS, so every PRUNE_EVERY stores a process also trims it to
+the newest LLM_CACHE_MAX_DOCUMENTS (default 50k, i.e. roughly 50-250 MB).
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+CACHE_COLLECTION = "llm_cache"
+
+# Stores per process between two size checks of the Mongo tier
+PRUNE_EVERY = 100
+
+# Per-process counters (reported by /metrics/llm-providers)
+cache_stats: Dict[str, int] = {"memory_hits": 0, "mongo_hits": 0, "misses": 0, "stores": 0, "pruned": 0, "errors": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, n: int = 1) -> int:
+    with _stats_lock:
+        cache_stats[name] += n
+        return cache_stats[name]
+
+
+def ensure_llm_cache_indexes():
+    """TTL index so cached responses expire after LLM_CACHE_TTL_HOURS."""
+    get_sync_db()[CACHE_COLLECTION].create_index(
+        [("created_at", ASCENDING)],
+        expireAfterSeconds=int(settings.LLM_CACHE_TTL_HOURS * 3600),
+    )
+
+
+def _normalize(text: str) -> str:
+    # Indentation / blank lines in f-string prompts don't change the answer
+    return " ".join((text or "").split())
+
+
+def llm_cache_key(system_prompt: str, user_prompt: str, temperature: float, prompt_version: str) -> str:
+    digest = hashlib.sha256(
+        f"{_normalize(system_prompt)}\x00{_normalize(user_prompt)}".encode("utf-8")
+    ).hexdigest()
+    return f"{prompt_version}:{temperature:g}:{digest}"
+
+
+class _MemoryTier:
+    """LRU with per-entry expiry; values are deep-copied in and out (callers mutate results)."""
+
+    def __init__(self):
+        self._items: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        ttl = settings.LLM_CACHE_TTL_HOURS * 3600 if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._items[key] = (time.monotonic() + ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > max(0, settings.LLM_CACHE_MEMORY_ITEMS):
+                self._items.popitem(last=False)
+
+
+_memory = _MemoryTier()
+
+
+def cache_enabled(prompt_version: Optional[str]) -> bool:
+    return bool(prompt_version) and settings.LLM_CACHE_ENABLED
+
+
+def _fresh(doc: Dict[str, Any]) -> Optional[float]:
+    """Seconds of life left for a Mongo entry (the TTL monitor only runs once a minute)."""
+    expires_at = doc["created_at"] + timedelta(hours=settings.LLM_CACHE_TTL_HOURS)
+    remaining = (expires_at - datetime.utcnow()).total_seconds()
+    return remaining if remaining > 0 else None
+
+
+def _hit(key: str, tier: str, value: Dict[str, Any]) -> Dict[str, Any]:
+    _count(f"{tier}_hits")
+    print(f"[LLM] cache hit ({tier}) – {key.split(':')[0]}, provider call skip!", flush=True)
+    logger.info("LLM cache hit | tier=%s | key=%s", tier, key)
+    return value
+
+
+def get_cached(key: str) -> Optional[Dict[str, Any]]:
+    value = _memory.get(key)
+    if value is not None:
+        return _hit(key, "memory", value)
+    try:
+        doc = get_sync_db()[CACHE_COLLECTION].find_one({"_id": key})
+    except Exception:
+        _count("errors")
+        logger.exception("LLM cache lookup failed: %s", key)
+        doc = None
+    remaining = _fresh(doc) if doc else None
+    if remaining is None:
+        _count("misses")
+        return None
+    _memory.put(key, doc["value"], remaining)
+    return _hit(key, "mongo", doc["value"])
+
+
+def _prune_cutoff_query(newest: Dict[str, Any]) -> Dict[str, Any]:
+    return {"created_at": {"$lte": newest["created_at"]}}
+
+
+def _pruned(deleted: int):
+    if deleted:
+        _count("pruned", deleted)
+        print(f"[LLM] cache bhar gaya – {deleted} purane entries hata diye", flush=True)
+        logger.info("LLM cache pruned %d entries (max %d)", deleted, settings.LLM_CACHE_MAX_DOCUMENTS)
+
+
+def prune_llm_cache():
+    """Drop the oldest entries beyond LLM_CACHE_MAX_DOCUMENTS (0 = TTL only)."""
+    if settings.LLM_CACHE_MAX_DOCUMENTS <= 0:
+        return
+    collection = get_sync_db()[CACHE_COLLECTION]
+    # created_at is indexed (TTL index) – skip walks the index, not the documents
+    oldest_kept = list(
+        collection.find({}, {"created_at": 1})
+        .sort("created_at", DESCENDING)
+        .skip(settings.LLM_CACHE_MAX_DOCUMENTS)
+        .limit(1)
+    )
+    if oldest_kept:
+        _pruned(collection.delete_many(_prune_cutoff_query(oldest_kept[0])).deleted_count)
+
+
+def put_cached(key: str, value: Dict[str, Any]):
+    _memory.put(key, value)
+    stores = _count("stores")
+    try:
+        get_sync_db()[CACHE_COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {"value": value, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        if stores % PRUNE_EVERY == 0:
+            prune_llm_cache()
+    except Exception:
+        # Cache is best-effort – never fail the LLM call because of it
+        _count("errors")
+        logger.exception("LLM cache write failed: %s", key)
+
+
+async def get_cached_async(key: str) -> Optional[Dict[str, Any]]:
+    value = _memory.get(key)
+    if value is not None:
+        return _hit(key, "memory", value)
+    from app.core.database import db
+
+    try:
+        doc = await db[CACHE_COLLECTION].find_one({"_id": key})
+    except Exception:
+        _count("errors")
+        logger.exception("LLM cache lookup failed: %s", key)
+        doc = None
+    remaining = _fresh(doc) if doc else None
+    if remaining is None:
+        _count("misses")
+        return None
+    _memory.put(key, doc["value"], remaining)
+    return _hit(key, "mongo", doc["value"])
+
+
+async def prune_llm_cache_async():
+    from app.core.database import db
+
+    if settings.LLM_CACHE_MAX_DOCUMENTS <= 0:
+        return
+    collection = db[CACHE_COLLECTION]
+    oldest_kept = await (
+        collection.find({}, {"created_at": 1})
+        .sort("created_at", DESCENDING)
+        .skip(settings.LLM_CACHE_MAX_DOCUMENTS)
+        .to_list(length=1)
+    )
+    if oldest_kept:
+        _pruned((await collection.delete_many(_prune_cutoff_query(oldest_kept[0]))).deleted_count)
+
+
+async def put_cached_async(key: str, value: Dict[str, Any]):
+    from app.core.database import db
+
+    _memory.put(key, value)
+    stores = _count("stores")
+    try:
+        await db[CACHE_COLLECTION].update_one(
+            {"_id": key},
+            {"$set": {"value": value, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+        if stores % PRUNE_EVERY == 0:
+            await prune_llm_cache_async()
+    except Exception:
+        _count("errors")
+        logger.exception("LLM cache write failed: %s", key)
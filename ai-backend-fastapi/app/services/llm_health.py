@@ -0,0 +1,188 @@
+"""
+Per-provider health for generate_json(): rolling error rate, EWMA latency and a circuit
+breaker (closed -> open -> half-open -> closed).
+
+State is per process. A provider whose circuit is open is skipped without waiting for
+its timeout; after LLM_CIRCUIT_COOLDOWN_SECONDS one request is let through as a probe
+(half-open) and its outcome closes or re-opens the circuit.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.services.pipeline_metrics import percentile
+
+logger = get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=max(1, settings.LLM_HEALTH_WINDOW))  # True = success
+        self.ewma_latency_ms: Optional[float] = None
+        self.latencies = deque(maxlen=max(1, settings.LLM_HEALTH_WINDOW))  # successful calls only
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.last_call_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self.opened_at >= settings.LLM_CIRCUIT_COOLDOWN_SECONDS
+
+    def available(self) -> bool:
+        """Could allow_request() succeed right now? (no side effects – used for ordering)"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                return self._cooled_down()
+            return not self.probe_in_flight
+
+    def degraded(self) -> bool:
+        """
+        Closed but unhealthy: tried after healthy providers. Demoted providers get little
+        traffic to refresh their stats, so the demotion lapses after the cooldown.
+        """
+        if time.monotonic() - self.last_call_at >= settings.LLM_CIRCUIT_COOLDOWN_SECONDS:
+            return False
+        if len(self.outcomes) >= settings.LLM_CIRCUIT_MIN_CALLS and self.error_rate >= settings.LLM_DEGRADED_ERROR_RATE:
+            return True
+        return self.ewma_latency_ms is not None and self.ewma_latency_ms >= settings.LLM_SLOW_LATENCY_MS
+
+    def allow_request(self) -> bool:
+        """Call right before using the provider; claims the half-open probe slot."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if not self._cooled_down():
+                    return False
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+                print(f"[LLM] circuit half-open: {self.name} – probe request bhej rahe hain", flush=True)
+                logger.info("LLM circuit half-open: %s", self.name)
+            if self.probe_in_flight:
+                return False
+            self.probe_in_flight = True
+            return True
+
+    def record_cancelled(self, latency_ms: float):
+        """
+        Call was cancelled (lost a hedge race) after latency_ms. Its real latency is at least
+        that, so it only ever pushes the EWMA up – a provider that keeps losing gets demoted.
+        Not an outcome: error rate and circuit are untouched.
+        """
+        with self._lock:
+            self.probe_in_flight = False
+            if self.ewma_latency_ms is None or latency_ms > self.ewma_latency_ms:
+                self._update_latency(latency_ms)
+
+    def _update_latency(self, latency_ms: float):
+        self.last_call_at = time.monotonic()
+        alpha = settings.LLM_EWMA_ALPHA
+        if self.ewma_latency_ms is None:
+            self.ewma_latency_ms = latency_ms
+        else:
+            self.ewma_latency_ms = alpha * latency_ms + (1 - alpha) * self.ewma_latency_ms
+
+    def record_success(self, latency_ms: float):
+        with self._lock:
+            self.outcomes.append(True)
+            self.latencies.append(latency_ms)
+            self._update_latency(latency_ms)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                print(f"[LLM] circuit closed: {self.name} – provider wapas theek hai", flush=True)
+                logger.info("LLM circuit closed: %s", self.name)
+            self.state = CLOSED
+            self.probe_in_flight = False
+
+    def record_failure(self, latency_ms: float):
+        with self._lock:
+            self.outcomes.append(False)
+            self._update_latency(latency_ms)
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+
+            trip = (
+                self.state == HALF_OPEN
+                or self.consecutive_failures >= settings.LLM_CIRCUIT_CONSECUTIVE_FAILURES
+                or (
+                    len(self.outcomes) >= settings.LLM_CIRCUIT_MIN_CALLS
+                    and self.error_rate >= settings.LLM_CIRCUIT_ERROR_RATE
+                )
+            )
+            if trip:
+                if self.state != OPEN:
+                    print(f"[LLM] circuit OPEN: {self.name} – {settings.LLM_CIRCUIT_COOLDOWN_SECONDS}s tak skip karenge", flush=True)
+                    logger.error(
+                        "LLM circuit opened: %s | error_rate=%.2f | consecutive_failures=%d",
+                        self.name, self.error_rate, self.consecutive_failures,
+                    )
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def latency_percentile(self, pct: float, min_samples: int = 1) -> Optional[float]:
+        """pct-th percentile of recent successful call latencies (None until min_samples)."""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return percentile(samples, pct)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "error_rate": round(self.error_rate, 3),
+                "calls_in_window": len(self.outcomes),
+                "ewma_latency_ms": round(self.ewma_latency_ms, 1) if self.ewma_latency_ms is not None else None,
+                "p90_latency_ms": round(percentile(sorted(self.latencies), 90), 1) if self.latencies else None,
+                "consecutive_failures": self.consecutive_failures,
+            }
+
+
+_providers: Dict[str, ProviderHealth] = {}
+_providers_lock = threading.Lock()
+
+
+def get_health(name: str) -> ProviderHealth:
+    health = _providers.get(name)
+    if health is None:
+        with _providers_lock:
+            health = _providers.setdefault(name, ProviderHealth(name))
+    return health
+
+
+def rank_providers(preferred_order: List[str]) -> List[str]:
+    """
+    Preferred order (AI_PROVIDER_ORDER) reordered by observed health: healthy first, then
+    degraded (high error rate / slow EWMA latency), each group keeping the preferred order.
+    Providers with an open circuit are left out.
+    """
+    healthy, degraded = [], []
+    for name in preferred_order:
+        health = get_health(name)
+        if not health.available():
+            continue
+        (degraded if health.state == CLOSED and health.degraded() else healthy).append(name)
+    return healthy + degraded
+
+
+def health_snapshot() -> Dict[str, Dict[str, object]]:
+    return {name: health.snapshot() for name, health in list(_providers.items())}
@@ -1,9 +1,21 @@
+import asyncio
 import json
 import re
-from typing import Any, Dict, Optional
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.llm_cache import (
+    cache_enabled,
+    get_cached,
+    get_cached_async,
+    llm_cache_key,
+    put_cached,
+    put_cached_async,
+)
+from app.services.llm_health import get_health, rank_providers
 
 logger = get_logger(__name__)
 
@@ -42,17 +54,129 @@ def _require(v: Optional[str], name: str) -> str:
     return v
 
 
-def _call_groq_json(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+# Long-lived provider clients, one per process. Building a client per call meant a new
+# connection pool (and TLS handshake) for every scoring / follow-up request.
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _cached_client(name: str, factory: Callable[[], Any]) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                print(f"[LLM] creating pooled client: {name}", flush=True)
+                client = _clients[name] = factory()
+    return client
+
+
+def _http_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _http_client():
+    """httpx client with a tunable keep-alive pool (thread-safe, shared across requests)."""
+    import httpx
+
+    return httpx.Client(limits=_http_limits(), timeout=settings.LLM_TIMEOUT_SECONDS)
+
+
+def _async_http_client():
+    """Async counterpart. Bound to the event loop it is first used on (uvicorn runs one)."""
+    import httpx
+
+    return httpx.AsyncClient(limits=_http_limits(), timeout=settings.LLM_TIMEOUT_SECONDS)
+
+
+def _groq_client():
     """
     Groq Cloud is OpenAI-compatible.
     Docs base_url: https://api.groq.com/openai/v1
     """
     from openai import OpenAI
 
-    client = OpenAI(
+    return _cached_client("groq", lambda: OpenAI(
         base_url="https://api.groq.com/openai/v1",
         api_key=_require(settings.GROQ_API_KEY, "GROQ_API_KEY"),
-    )
+        http_client=_http_client(),
+    ))
+
+
+def _azure_client():
+    from openai import AzureOpenAI
+
+    return _cached_client("azure", lambda: AzureOpenAI(
+        azure_endpoint=_require(settings.AZURE_OPENAI_ENDPOINT, "AZURE_OPENAI_ENDPOINT"),
+        api_key=_require(settings.AZURE_OPENAI_KEY, "AZURE_OPENAI_KEY"),
+        api_version=_require(settings.AZURE_OPENAI_API_VERSION, "AZURE_OPENAI_API_VERSION"),
+        http_client=_http_client(),
+    ))
+
+
+def _groq_async_client():
+    from openai import AsyncOpenAI
+
+    return _cached_client("groq-async", lambda: AsyncOpenAI(
+        base_url="https://api.groq.com/openai/v1",
+        api_key=_require(settings.GROQ_API_KEY, "GROQ_API_KEY"),
+        http_client=_async_http_client(),
+    ))
+
+
+def _azure_async_client():
+    from openai import AsyncAzureOpenAI
+
+    return _cached_client("azure-async", lambda: AsyncAzureOpenAI(
+        azure_endpoint=_require(settings.AZURE_OPENAI_ENDPOINT, "AZURE_OPENAI_ENDPOINT"),
+        api_key=_require(settings.AZURE_OPENAI_KEY, "AZURE_OPENAI_KEY"),
+        api_version=_require(settings.AZURE_OPENAI_API_VERSION, "AZURE_OPENAI_API_VERSION"),
+        http_client=_async_http_client(),
+    ))
+
+
+_gemini_models: Dict[Tuple[str, str], Any] = {}
+
+
+def _configure_gemini():
+    import google.generativeai as genai
+
+    genai.configure(api_key=_require(settings.GEMINI_API_KEY, "GEMINI_API_KEY"))
+    return genai
+
+
+def _gemini_model(system_prompt: str):
+    """
+    genai.configure() sets up one process-wide transport; do it once. Models are cached
+    per system prompt (system_instruction is fixed per GenerativeModel) – there are only
+    a handful of distinct system prompts.
+    """
+    genai = _cached_client("gemini", _configure_gemini)
+
+    model_name = (settings.GEMINI_MODEL or "gemini-2.0-flash").strip()
+    # list_models() returns names like "models/gemini-2.0-flash" but GenerativeModel
+    # typically accepts "gemini-2.0-flash". Normalize for safety.
+    if model_name.startswith("models/"):
+        model_name = model_name[len("models/") :]
+
+    key = (model_name, system_prompt)
+    model = _gemini_models.get(key)
+    if model is None:
+        with _clients_lock:
+            model = _gemini_models.get(key)
+            if model is None:
+                model = _gemini_models[key] = genai.GenerativeModel(model_name=model_name, system_instruction=system_prompt)
+    return model
+
+
+def _call_groq_json(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+    client = _groq_client()
 
     model = (settings.GROQ_MODEL or "llama-3.1-8b-instant").strip()
 
@@ -85,13 +209,7 @@ def _call_groq_json(system_prompt: str, user_prompt: str, temperature: float) ->
 
 
 def _call_azure_json(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
-    from openai import AzureOpenAI
-
-    client = AzureOpenAI(
-        azure_endpoint=_require(settings.AZURE_OPENAI_ENDPOINT, "AZURE_OPENAI_ENDPOINT"),
-        api_key=_require(settings.AZURE_OPENAI_KEY, "AZURE_OPENAI_KEY"),
-        api_version=_require(settings.AZURE_OPENAI_API_VERSION, "AZURE_OPENAI_API_VERSION"),
-    )
+    client = _azure_client()
 
     resp = client.chat.completions.create(
         model=_require(settings.AZURE_OPENAI_DEPLOYMENT, "AZURE_OPENAI_DEPLOYMENT"),
@@ -108,14 +226,7 @@ def _call_azure_json(system_prompt: str, user_prompt: str, temperature: float) -
 def _call_gemini_json(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
     import google.generativeai as genai
 
-    genai.configure(api_key=_require(settings.GEMINI_API_KEY, "GEMINI_API_KEY"))
-    model_name = (settings.GEMINI_MODEL or "gemini-2.0-flash").strip()
-    # list_models() returns names like "models/gemini-2.0-flash" but GenerativeModel
-    # typically accepts "gemini-2.0-flash". Normalize for safety.
-    if model_name.startswith("models/"):
-        model_name = model_name[len("models/") :]
-
-    model = genai.GenerativeModel(model_name=model_name, system_instruction=system_prompt)
+    model = _gemini_model(system_prompt)
 
     # Try strict JSON output if supported
     try:
@@ -136,10 +247,81 @@ def _call_gemini_json(system_prompt: str, user_prompt: str, temperature: float)
         return _extract_json_object(getattr(resp, "text", "") or "")
 
 
-def generate_json(system_prompt: str, user_prompt: str, temperature: float = 0.2) -> Dict[str, Any]:
+async def _call_groq_json_async(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+    client = _groq_async_client()
+
+    model = (settings.GROQ_MODEL or "llama-3.1-8b-instant").strip()
+
+    # Try structured JSON output; fall back if not supported by model.
+    try:
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+            temperature=temperature,
+            response_format={"type": "json_object"},
+        )
+    except Exception as e:
+        logger.warning("Groq response_format failed, retrying prompt-only. err=%s", str(e))
+        resp = await client.chat.completions.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {
+                    "role": "user",
+                    "content": user_prompt + "\n\nReturn STRICT JSON only. No markdown. No extra text.",
+                },
+            ],
+            temperature=temperature,
+        )
+
+    return _extract_json_object(resp.choices[0].message.content)
+
+
+async def _call_azure_json_async(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+    client = _azure_async_client()
+
+    resp = await client.chat.completions.create(
+        model=_require(settings.AZURE_OPENAI_DEPLOYMENT, "AZURE_OPENAI_DEPLOYMENT"),
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+        temperature=temperature,
+        response_format={"type": "json_object"},
+    )
+    return _extract_json_object(resp.choices[0].message.content)
+
+
+async def _call_gemini_json_async(system_prompt: str, user_prompt: str, temperature: float) -> Dict[str, Any]:
+    import google.generativeai as genai
+
+    model = _gemini_model(system_prompt)
+
+    # Try strict JSON output if supported
+    try:
+        resp = await model.generate_content_async(
+            user_prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                response_mime_type="application/json",
+            ),
+        )
+        return _extract_json_object(getattr(resp, "text", "") or "")
+    except Exception as e:
+        logger.warning("Gemini JSON mime failed, retrying prompt-only. err=%s", str(e))
+        resp = await model.generate_content_async(
+            user_prompt + "\n\nReturn STRICT JSON only. No markdown. No extra text.",
+            generation_config=genai.types.GenerationConfig(temperature=temperature),
+        )
+        return _extract_json_object(getattr(resp, "text", "") or "")
+
+
+def _provider_order() -> List[str]:
     """
-    Provider-agnostic JSON generator with fallback.
-    Default order: groq -> gemini -> azure
+    AI_PROVIDER_ORDER (default groq -> gemini -> azure), with AI_PROVIDER moved to the front.
     """
     preferred = (settings.AI_PROVIDER or "").strip().lower()
     order_raw = (getattr(settings, "AI_PROVIDER_ORDER", "") or "").strip()
@@ -156,7 +338,87 @@ def generate_json(system_prompt: str, user_prompt: str, temperature: float = 0.2
     elif preferred and preferred not in order:
         order = [preferred] + order
 
-    print(f"[LLM] generate_json — try order: {', '.join(order)}", flush=True)
+    return order
+
+
+def _attempt_order(label: str) -> List[str]:
+    """_provider_order() re-ranked by provider health; open circuits are left out."""
+    preferred = _provider_order()
+    order = rank_providers(preferred)
+    print(f"[LLM] {label} — try order: {', '.join(order) or '(none)'}", flush=True)
+    skipped = [p for p in preferred if p not in order]
+    if skipped:
+        print(f"[LLM] circuit open, skipping: {', '.join(skipped)}", flush=True)
+    return order
+
+
+def _record_outcome(p: str, started: float, err: Optional[Exception] = None):
+    latency_ms = (time.perf_counter() - started) * 1000
+    if err is None:
+        get_health(p).record_success(latency_ms)
+        print(f"[LLM] success — response from: {p} ({latency_ms:.0f} ms)", flush=True)
+        return
+    get_health(p).record_failure(latency_ms)
+    print(f"[LLM] provider failed: {p} — {err!s}", flush=True)
+    # One line per failure; the breaker logs (once) when a provider is taken out of rotation
+    logger.warning("LLM provider failed: %s | %.0f ms | err=%s", p, latency_ms, err)
+
+
+def _no_provider_error(last_err: Optional[Exception]) -> Exception:
+    if last_err is not None:
+        return last_err
+    return RuntimeError("No LLM provider available (all circuits open)")
+
+
+def _cache_key(
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    prompt_version: Optional[str],
+    validate: Optional[Callable[[Dict[str, Any]], Any]],
+) -> Optional[str]:
+    """
+    Only validated responses are cached – a malformed answer stored once would be replayed
+    to every retry for LLM_CACHE_TTL_HOURS instead of asking the LLM again.
+    """
+    if validate is None or not cache_enabled(prompt_version):
+        return None
+    return llm_cache_key(system_prompt, user_prompt, temperature, prompt_version)
+
+
+def _validated(cached: Optional[Dict[str, Any]], validate: Callable[[Dict[str, Any]], Any]) -> Optional[Dict[str, Any]]:
+    """Cached entry, unless it fails the caller's current validator (treated as a miss)."""
+    if cached is None:
+        return None
+    try:
+        validate(cached)
+    except Exception as e:
+        logger.warning("Cached LLM response rejected by validator, calling provider | err=%s", e)
+        return None
+    return cached
+
+
+def generate_json(
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float = 0.2,
+    prompt_version: Optional[str] = None,
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Provider-agnostic JSON generator with fallback.
+    Default order: groq -> gemini -> azure, re-ranked by provider health (llm_health).
+    `validate` may raise to reject a provider's answer (the next provider is tried).
+    With a prompt_version and a validator the response is cached (llm_cache).
+    Blocking – from async code use generate_json_async().
+    """
+    cache_key = _cache_key(system_prompt, user_prompt, temperature, prompt_version, validate)
+    if cache_key:
+        cached = _validated(get_cached(cache_key), validate)
+        if cached is not None:
+            return cached
+
+    order = _attempt_order("generate_json")
 
     def try_provider(p: str) -> Dict[str, Any]:
         if p == "groq":
@@ -169,16 +431,213 @@ def generate_json(system_prompt: str, user_prompt: str, temperature: float = 0.2
 
     last_err: Optional[Exception] = None
     for p in order:
+        if not get_health(p).allow_request():
+            continue  # half-open and another request is already probing it
+        started = time.perf_counter()
         try:
             print(f"[LLM] calling provider: {p}", flush=True)
             result = try_provider(p)
-            print(f"[LLM] success — response from: {p}", flush=True)
-            return result
+            if validate is not None:
+                validate(result)
+        except Exception as e:
+            last_err = e
+            _record_outcome(p, started, e)
+            continue
+        _record_outcome(p, started)
+        if cache_key:
+            put_cached(cache_key, result)
+        return result
+
+    raise _no_provider_error(last_err)
+
+
+_ASYNC_PROVIDERS: Dict[str, Callable[[str, str, float], Awaitable[Dict[str, Any]]]] = {
+    "groq": _call_groq_json_async,
+    "gemini": _call_gemini_json_async,
+    "azure": _call_azure_json_async,
+}
+
+
+async def _call_provider_async(
+    p: str,
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> Dict[str, Any]:
+    """One provider attempt, with its outcome recorded in provider health."""
+    started = time.perf_counter()
+    print(f"[LLM] calling provider: {p}", flush=True)
+    try:
+        call = _ASYNC_PROVIDERS.get(p)
+        if call is None:
+            raise RuntimeError(f"Unsupported provider: {p}")
+        result = await call(system_prompt, user_prompt, temperature)
+        if validate is not None:
+            validate(result)
+    except asyncio.CancelledError:
+        # Lost a hedge race (or the request went away) – no outcome, but the time it took
+        get_health(p).record_cancelled((time.perf_counter() - started) * 1000)
+        raise
+    except Exception as e:
+        _record_outcome(p, started, e)
+        raise
+    _record_outcome(p, started)
+    return result
+
+
+# Hedge budget: every hedged call earns LLM_HEDGE_BUDGET_RATIO tokens, every extra request
+# spends one – so at most that share of calls pay for a second provider.
+HEDGE_BUCKET_CAP = 5.0
+_hedge_tokens = HEDGE_BUCKET_CAP
+_hedge_lock = threading.Lock()
+hedge_stats: Dict[str, int] = {"calls": 0, "hedges": 0, "hedge_wins": 0, "over_budget": 0}
+
+
+def _earn_hedge_budget():
+    global _hedge_tokens
+    with _hedge_lock:
+        hedge_stats["calls"] += 1
+        _hedge_tokens = min(HEDGE_BUCKET_CAP, _hedge_tokens + settings.LLM_HEDGE_BUDGET_RATIO)
+
+
+def _spend_hedge_budget() -> bool:
+    global _hedge_tokens
+    with _hedge_lock:
+        if _hedge_tokens < 1:
+            hedge_stats["over_budget"] += 1
+            return False
+        _hedge_tokens -= 1
+        hedge_stats["hedges"] += 1
+        return True
+
+
+def _hedge_delay_seconds(p: str) -> float:
+    """How long to give provider p before hedging: its recent LLM_HEDGE_PERCENTILE latency."""
+    observed_ms = get_health(p).latency_percentile(settings.LLM_HEDGE_PERCENTILE, settings.LLM_HEDGE_MIN_SAMPLES)
+    if observed_ms is None:
+        observed_ms = settings.LLM_HEDGE_DEFAULT_DELAY_MS
+    return max(observed_ms, settings.LLM_HEDGE_MIN_DELAY_MS) / 1000
+
+
+async def _generate_json_hedged(order: List[str], call: Callable[[str], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Walk `order` like generate_json_async(), but when the request in flight is slower than
+    its provider's usual latency, start the next provider alongside it. The first valid
+    answer wins and the other request is cancelled.
+    """
+    _earn_hedge_budget()
+    remaining = list(order)
+    pending: Dict["asyncio.Task[Dict[str, Any]]", str] = {}
+    hedges_left = max(0, settings.LLM_HEDGE_MAX_EXTRA)
+    newest: Optional[str] = None
+    hedged = set()
+    last_err: Optional[Exception] = None
+
+    def launch() -> bool:
+        nonlocal newest
+        while remaining:
+            p = remaining.pop(0)
+            if get_health(p).allow_request():
+                pending[asyncio.ensure_future(call(p))] = p
+                newest = p
+                return True
+        return False
+
+    launch()
+    try:
+        while pending:
+            timeout = _hedge_delay_seconds(newest) if hedges_left and remaining else None
+            done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                hedges_left -= 1
+                if not _spend_hedge_budget():
+                    print("[LLM] hedge budget used up – waiting on", newest, flush=True)
+                    hedges_left = 0
+                    continue
+                slow = newest
+                if launch():
+                    hedged.add(newest)
+                    print(f"[LLM] hedging: {slow} slower than {timeout * 1000:.0f} ms, also trying {newest}", flush=True)
+                continue
+
+            results = []
+            for task in done:
+                p = pending.pop(task)
+                if task.exception() is None:
+                    results.append((p, task.result()))
+                else:
+                    last_err = task.exception()
+            if results:
+                winner, result = results[0]
+                if winner in hedged:
+                    hedge_stats["hedge_wins"] += 1
+                return result
+            if not pending:
+                launch()  # plain fallback after a failure
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    raise _no_provider_error(last_err)
+
+
+async def generate_json_async(
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float = 0.2,
+    hedge: bool = False,
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    prompt_version: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Same as generate_json() (same provider order, health ranking and fallback) on the
+    providers' async clients, so a slow LLM call doesn't block the event loop for every
+    other request.
+
+    hedge=True: for latency-critical calls – a slow provider gets a backup request to the
+    next one (see _generate_json_hedged, LLM_HEDGE_*). `validate` may raise to reject a
+    provider's answer (it then counts as that provider failing and the next one is used);
+    as in generate_json(), only validated responses are cached.
+    """
+    cache_key = _cache_key(system_prompt, user_prompt, temperature, prompt_version, validate)
+    if cache_key:
+        cached = _validated(await get_cached_async(cache_key), validate)
+        if cached is not None:
+            return cached
+
+    result = await _generate_json_uncached_async(system_prompt, user_prompt, temperature, hedge, validate)
+    if cache_key:
+        await put_cached_async(cache_key, result)
+    return result
+
+
+async def _generate_json_uncached_async(
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    hedge: bool,
+    validate: Optional[Callable[[Dict[str, Any]], Any]],
+) -> Dict[str, Any]:
+    order = _attempt_order("generate_json_async")
+
+    async def call(p: str) -> Dict[str, Any]:
+        return await _call_provider_async(p, system_prompt, user_prompt, temperature, validate)
+
+    if hedge and settings.LLM_HEDGE_ENABLED:
+        return await _generate_json_hedged(order, call)
+
+    last_err: Optional[Exception] = None
+    for p in order:
+        if not get_health(p).allow_request():
+            continue
+        try:
+            return await call(p)
         except Exception as e:
             last_err = e
-            print(f"[LLM] provider failed: {p} — {e!s}", flush=True)
-            logger.exception("LLM provider failed: %s", p)
             continue
 
-    assert last_err is not None
-    raise last_err
\ No newline at end of file
+    raise _no_provider_error(last_err)
@@ -0,0 +1,87 @@
+"""
+Per-stage latency of the answer pipeline.
+
+process_answer_pipeline() times each stage with a StageTimer and stores the result
+on the answer as `timings` ({stage}_ms values + worker identity). summarize_timings()
+turns a batch of those documents into per-stage percentiles for capacity planning.
+"""
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Order used in the aggregated view. Stages served from the analysis cache are absent.
+STAGES = ("queue_wait", "download", "decode", "transcribe", "emotion", "score", "total")
+PERCENTILES = (50, 90, 95, 99)
+
+
+class StageTimer:
+    """Collects wall-clock milliseconds per stage. Safe to record from the stage threads."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.stages: Dict[str, int] = {}
+
+    def record(self, name: str, elapsed_ms: float):
+        # Same stage twice (e.g. incremental tail + full transcript) adds up
+        self.stages[name] = self.stages.get(name, 0) + int(round(elapsed_ms))
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name: str, fn, *args, **kwargs):
+        """Run fn and record its duration – for work submitted to the stage executor."""
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def as_doc(self, **extra) -> Dict[str, Any]:
+        """Document stored as `interview_answers.timings`."""
+        doc: Dict[str, Any] = {f"{name}_ms": ms for name, ms in self.stages.items()}
+        doc["total_ms"] = int(round((time.perf_counter() - self._started) * 1000))
+        doc["finished_at"] = datetime.utcnow()
+        doc.update({k: v for k, v in extra.items() if v is not None})
+        return doc
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear interpolation between closest ranks (same as numpy's default)."""
+    if len(sorted_values) == 1:
+        return float(sorted_values[0])
+    rank = (len(sorted_values) - 1) * pct / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize_timings(timings: Iterable[Optional[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """Per-stage count / mean / percentiles / max over a batch of `timings` documents."""
+    values: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    for doc in timings:
+        for stage in STAGES:
+            ms = (doc or {}).get(f"{stage}_ms")
+            if isinstance(ms, (int, float)):
+                values[stage].append(float(ms))
+
+    summary: Dict[str, Dict[str, Any]] = {}
+    for stage, samples in values.items():
+        if not samples:
+            continue
+        samples.sort()
+        stats: Dict[str, Any] = {
+            "count": len(samples),
+            "mean_ms": round(sum(samples) / len(samples), 1),
+            "max_ms": samples[-1],
+        }
+        for pct in PERCENTILES:
+            stats[f"p{pct}_ms"] = round(percentile(samples, pct), 1)
+        summary[stage] = stats
+    return summary
@@ -1,14 +1,22 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
 from app.core.logger import get_logger
-from app.services.llm_json import generate_json
+from app.services.llm_json import generate_json, generate_json_async
 
 logger = get_logger(__name__)
 
+SYSTEM_PROMPT = "Return STRICT JSON only."
+# LLM cache key component – bump when the scoring prompt or rubric changes
+PROMPT_VERSION = "score-v1"
+BATCH_PROMPT_VERSION = "score-batch-v1"
 
-def score_answer(question: str, transcript: str, emotion: str, confidence: str):
-    print("[Backend 🎤] ScoringService: GPT ko bhej rahe hain – question + transcript + emotion, score maang rahe hain!")
-    logger.info("Scoring answer with GPT")
+SCORE_KEYS = ("accuracy", "communication", "behavior")
 
-    prompt = f"""
+
+def _scoring_prompt(question: str, transcript: str, emotion: str, confidence: str) -> str:
+    return f"""
 You are an expert technical interviewer.
 
 QUESTION:
@@ -30,12 +38,214 @@ Score strictly (0-100) and return JSON ONLY:
 }}
 """
 
+
+def score_answer(question: str, transcript: str, emotion: str, confidence: str):
+    print("[Backend 🎤] ScoringService: GPT ko bhej rahe hain – question + transcript + emotion, score maang rahe hain!")
+    logger.info("Scoring answer with GPT")
+
     result = generate_json(
-        system_prompt="Return STRICT JSON only.",
-        user_prompt=prompt,
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=_scoring_prompt(question, transcript, emotion, confidence),
         temperature=0.2,
+        prompt_version=PROMPT_VERSION,
+        validate=_require_score,
     )
     print("[Backend 🎤] ScoringService: GPT ne score de diya – accuracy, communication, behavior, feedback!")
     logger.info("Scoring completed")
 
     return result
+
+
+async def score_answer_async(question: str, transcript: str, emotion: str, confidence: str):
+    """score_answer() for async handlers – doesn't block the event loop."""
+    print("[Backend 🎤] ScoringService: GPT ko bhej rahe hain (async) – score maang rahe hain!")
+    logger.info("Scoring answer with GPT (async)")
+
+    result = await generate_json_async(
+        system_prompt=SYSTEM_PROMPT,
+        user_prompt=_scoring_prompt(question, transcript, emotion, confidence),
+        temperature=0.2,
+        prompt_version=PROMPT_VERSION,
+        validate=_require_score,
+    )
+    print("[Backend 🎤] ScoringService: GPT ne score de diya – accuracy, communication, behavior, feedback!")
+    logger.info("Scoring completed")
+
+    return result
+
+
+# ---- Batch scoring: several answers per LLM call ---------------------------------------
+# items: [{"question", "transcript", "emotion", "confidence"}, ...]
+
+
+def _batch_scoring_prompt(items: List[Dict[str, Any]]) -> str:
+    answers = "\n".join(
+        f"""
+[ANSWER id={i}]
+QUESTION:
+{item["question"]}
+
+CANDIDATE ANSWER:
+{item["transcript"]}
+
+BEHAVIOR:
+Emotion: {item["emotion"]}
+Confidence: {item["confidence"]}
+"""
+        for i, item in enumerate(items)
+    )
+    return f"""
+You are an expert technical interviewer. Score each answer below independently.
+{answers}
+Score strictly (0-100) and return JSON ONLY, one entry per answer id:
+{{
+  "results": [
+    {{
+      "id": number,
+      "accuracy": number,
+      "communication": number,
+      "behavior": number,
+      "feedback": "one-line feedback"
+    }}
+  ]
+}}
+"""
+
+
+def _valid_score(entry: Any) -> Optional[Dict[str, Any]]:
+    """Score dict in score_answer()'s shape, or None if the entry is unusable."""
+    if not isinstance(entry, dict):
+        return None
+    score: Dict[str, Any] = {}
+    for key in SCORE_KEYS:
+        value = entry.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+            return None
+        score[key] = value
+    if not isinstance(entry.get("feedback"), str):
+        return None
+    score["feedback"] = entry["feedback"]
+    return score
+
+
+def _require_score(result: Dict[str, Any]):
+    """generate_json validator: reject (and never cache) answers without usable scores."""
+    if _valid_score(result) is None:
+        raise ValueError(f"Malformed scoring response: {str(result)[:200]}")
+
+
+def _require_batch_results(result: Dict[str, Any]):
+    # Individual entries are checked by _split_batch_result (bad ones fall back to single calls)
+    if not isinstance(result.get("results"), list):
+        raise ValueError("Batch scoring response has no results list")
+
+
+def _split_batch_result(result: Dict[str, Any], count: int) -> List[Optional[Dict[str, Any]]]:
+    scores: List[Optional[Dict[str, Any]]] = [None] * count
+    entries = result.get("results")
+    if not isinstance(entries, list):
+        return scores
+    for entry in entries:
+        item_id = entry.get("id") if isinstance(entry, dict) else None
+        if isinstance(item_id, str) and item_id.isdigit():
+            item_id = int(item_id)
+        if isinstance(item_id, int) and 0 <= item_id < count and scores[item_id] is None:
+            scores[item_id] = _valid_score(entry)
+    return scores
+
+
+def _chunks(items: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    size = max(1, settings.SCORING_BATCH_SIZE)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _score_chunk(chunk: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    if len(chunk) == 1:
+        return [None]  # nothing to batch – the single-item path handles it
+    try:
+        result = generate_json(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=_batch_scoring_prompt(chunk),
+            temperature=0.2,
+            prompt_version=BATCH_PROMPT_VERSION,
+            validate=_require_batch_results,
+        )
+    except Exception as e:
+        logger.warning("Batch scoring call failed, scoring %d answers one by one | err=%s", len(chunk), e)
+        return [None] * len(chunk)
+    return _split_batch_result(result, len(chunk))
+
+
+def _log_batch(scores: List[Optional[Dict[str, Any]]], fallbacks: int):
+    failed = sum(1 for s in scores if s is None)
+    print(f"[Backend 🎤] ScoringService: Batch scoring done – {len(scores)} answers, {fallbacks} single fallback, {failed} fail")
+    logger.info("Batch scoring completed | answers=%d | fallbacks=%d | failed=%d", len(scores), fallbacks, failed)
+
+
+def score_answers_batch(items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Score several answers with SCORING_BATCH_SIZE answers per LLM call. Each result is
+    validated on its own; answers missing or malformed in the batch response are re-scored
+    with score_answer(). Returns one score per item, in order (None if that also failed).
+    """
+    print("[Backend 🎤] ScoringService:", len(items), "answers ek saath score kar rahe hain (batch)!")
+    logger.info("Batch scoring %d answers", len(items))
+
+    scores: List[Optional[Dict[str, Any]]] = []
+    for chunk in _chunks(items):
+        scores.extend(_score_chunk(chunk))
+
+    fallbacks = [i for i, score in enumerate(scores) if score is None]
+    for i in fallbacks:
+        item = items[i]
+        try:
+            scores[i] = _valid_score(score_answer(item["question"], item["transcript"], item["emotion"], item["confidence"]))
+        except Exception:
+            logger.exception("Single-answer scoring failed (batch fallback) | item=%d", i)
+
+    _log_batch(scores, len(fallbacks))
+    return scores
+
+
+async def _score_chunk_async(chunk: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    if len(chunk) == 1:
+        return [None]
+    try:
+        result = await generate_json_async(
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=_batch_scoring_prompt(chunk),
+            temperature=0.2,
+            prompt_version=BATCH_PROMPT_VERSION,
+            validate=_require_batch_results,
+        )
+    except Exception as e:
+        logger.warning("Batch scoring call failed, scoring %d answers one by one | err=%s", len(chunk), e)
+        return [None] * len(chunk)
+    return _split_batch_result(result, len(chunk))
+
+
+async def _score_single_async(item: Dict[str, Any], index: int) -> Optional[Dict[str, Any]]:
+    try:
+        return _valid_score(
+            await score_answer_async(item["question"], item["transcript"], item["emotion"], item["confidence"])
+        )
+    except Exception:
+        logger.exception("Single-answer scoring failed (batch fallback) | item=%d", index)
+        return None
+
+
+async def score_answers_batch_async(items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """score_answers_batch() for async handlers; chunks (and fallbacks) run concurrently."""
+    print("[Backend 🎤] ScoringService:", len(items), "answers ek saath score kar rahe hain (batch, async)!")
+    logger.info("Batch scoring %d answers (async)", len(items))
+
+    scores: List[Optional[Dict[str, Any]]] = []
+    for chunk_scores in await asyncio.gather(*(_score_chunk_async(chunk) for chunk in _chunks(items))):
+        scores.extend(chunk_scores)
+
+    fallbacks = [i for i, score in enumerate(scores) if score is None]
+    for i, score in zip(fallbacks, await asyncio.gather(*(_score_single_async(items[i], i) for i in fallbacks))):
+        scores[i] = score
+
+    _log_batch(scores, len(fallbacks))
+    return scores
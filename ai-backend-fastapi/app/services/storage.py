@@ -0,0 +1,153 @@
+"""
+Object storage for uploaded files (resumes, answer videos, TTS audio).
+
+Select with STORAGE_BACKEND:
+  cloudinary – production (default)
+  local      – files under STORAGE_LOCAL_DIR, served by the /uploads static mount;
+               stand-in for running/benchmarking the stack without Cloudinary
+  memory     – in-process dict, for tests (URLs are not fetchable by workers)
+
+Uploads are blocking SDK/disk calls, so the async API runs them on a bounded thread pool
+instead of the event loop. Thread-context callers (background tasks, workers) use the
+*_sync methods directly.
+"""
+import asyncio
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class StoredObject:
+    url: str
+    key: str  # backend id used for deletion (Cloudinary public_id, relative path, ...)
+
+
+class StorageBackend:
+    name = "base"
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.STORAGE_UPLOAD_THREADS),
+            thread_name_prefix=f"storage-{self.name}",
+        )
+
+    def upload_file_sync(self, path: str, folder: str, resource_type: str = "raw") -> StoredObject:
+        """Store the file at `path` under `folder`. `resource_type`: raw | video (Cloudinary naming)."""
+        raise NotImplementedError
+
+    def delete_sync(self, key: str, resource_type: str = "raw"):
+        raise NotImplementedError
+
+    async def upload_file(self, path: str, folder: str, resource_type: str = "raw") -> StoredObject:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.upload_file_sync, path, folder, resource_type)
+
+    async def delete(self, key: str, resource_type: str = "raw"):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self.delete_sync, key, resource_type)
+
+
+class CloudinaryStorage(StorageBackend):
+    """Cloudinary SDK (its urllib3 pool is shared by all upload threads)."""
+
+    name = "cloudinary"
+
+    def __init__(self):
+        super().__init__()
+        from app.core import cloudinary_config  # noqa: F401 – applies credentials
+
+    def upload_file_sync(self, path: str, folder: str, resource_type: str = "raw") -> StoredObject:
+        import cloudinary.uploader
+
+        result = cloudinary.uploader.upload(path, resource_type=resource_type, folder=folder)
+        return StoredObject(url=result["secure_url"], key=result["public_id"])
+
+    def delete_sync(self, key: str, resource_type: str = "raw"):
+        import cloudinary.uploader
+
+        cloudinary.uploader.destroy(key, resource_type=resource_type)
+
+
+class LocalStorage(StorageBackend):
+    """Copies into STORAGE_LOCAL_DIR; URLs point at the API's /uploads static mount."""
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self.root = settings.STORAGE_LOCAL_DIR
+        os.makedirs(self.root, exist_ok=True)
+
+    def _url(self, key: str) -> str:
+        # STORAGE_LOCAL_DIR lives under uploads/, which main.py serves at /uploads
+        rel = os.path.relpath(os.path.join(self.root, key), "uploads").replace(os.sep, "/")
+        return f"{settings.STORAGE_PUBLIC_BASE_URL.rstrip('/')}/uploads/{rel}"
+
+    def upload_file_sync(self, path: str, folder: str, resource_type: str = "raw") -> StoredObject:
+        key = f"{folder.strip('/')}/{uuid.uuid4().hex}{os.path.splitext(path)[1]}"
+        dest = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copyfile(path, dest)
+        return StoredObject(url=self._url(key), key=key)
+
+    def delete_sync(self, key: str, resource_type: str = "raw"):
+        dest = os.path.join(self.root, key)
+        if os.path.exists(dest):
+            os.remove(dest)
+
+
+class MemoryStorage(StorageBackend):
+    """Keeps objects in a dict – for tests."""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self.objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def upload_file_sync(self, path: str, folder: str, resource_type: str = "raw") -> StoredObject:
+        key = f"{folder.strip('/')}/{uuid.uuid4().hex}{os.path.splitext(path)[1]}"
+        with open(path, "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.objects[key] = data
+        return StoredObject(url=f"memory://{key}", key=key)
+
+    def delete_sync(self, key: str, resource_type: str = "raw"):
+        with self._lock:
+            self.objects.pop(key, None)
+
+
+BACKENDS = {
+    CloudinaryStorage.name: CloudinaryStorage,
+    LocalStorage.name: LocalStorage,
+    MemoryStorage.name: MemoryStorage,
+}
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                key = (settings.STORAGE_BACKEND or "cloudinary").strip().lower()
+                if key not in BACKENDS:
+                    raise RuntimeError(f"Unsupported STORAGE_BACKEND: {key}")
+                print("[Backend 🎤] Storage: Backend –", key)
+                logger.info("Storage backend: %s", key)
+                _storage = BACKENDS[key]()
+    return _storage
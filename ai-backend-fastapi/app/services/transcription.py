@@ -0,0 +1,150 @@
+import threading
+from typing import Optional, Union
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Path to a 16 kHz audio file, or 16 kHz mono float32 samples
+AudioInput = Union[str, np.ndarray]
+
+# ISO-639-1 codes both engines accept (Whisper's language table; "jw" is its code for
+# Javanese). Static so the API can validate without importing whisper.
+SUPPORTED_LANGUAGES = frozenset("""
+    af am ar as az ba be bg bn bo br bs ca cs cy da de el en es et eu fa fi fo fr gl gu ha he
+    hi hr ht hu hy id is it ja jw ka kk km kn ko la lb ln lo lt lv mg mi mk ml mn mr ms mt my
+    ne nl nn no oc pa pl ps pt ro ru sa sd si sk sl sn so sq sr su sv sw ta te tg th tk tl tr
+    tt uk ur uz vi yi yo zh
+""".split())
+
+
+def normalize_language(value: Optional[str]) -> Optional[str]:
+    """
+    "en", "EN", "en-US", "en_us" -> "en"; empty -> None (auto-detect).
+    Raises ValueError for codes the engines don't know – they would fail every transcription.
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    code = value.replace("_", "-").split("-", 1)[0]
+    if code not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language: {value!r}")
+    return code
+
+
+class TranscriptionEngine:
+    """
+    Speech-to-text backend used by the answer pipeline.
+    Select with TRANSCRIBE_ENGINE; models load lazily on first use.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.model_size = (settings.TRANSCRIBE_MODEL or "base").strip()
+        self.beam_size = max(1, settings.TRANSCRIBE_BEAM_SIZE)
+        self.threads = max(0, settings.TRANSCRIBE_THREADS)
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> str:
+        """Identifies everything that changes the output (used as a cache key component)."""
+        return f"{self.name}:{self.model_size}:beam{self.beam_size}"
+
+    def load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    print("[Backend 🎤] Transcription: Model load ho raha hai –", self.version)
+                    logger.info("Loading transcription model: %s", self.version)
+                    self._model = self._load_model()
+        return self._model
+
+    def _load_model(self):
+        raise NotImplementedError
+
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None) -> str:
+        """Return the transcript. Passing `language` skips language detection."""
+        raise NotImplementedError
+
+
+class WhisperEngine(TranscriptionEngine):
+    """openai-whisper, fp32 on CPU."""
+
+    name = "whisper"
+
+    def _load_model(self):
+        import whisper
+
+        if self.threads:
+            import torch
+
+            torch.set_num_threads(self.threads)
+        return whisper.load_model(self.model_size, device="cpu")
+
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None) -> str:
+        options = {"fp16": False}
+        if language:
+            options["language"] = language
+        if self.beam_size > 1:
+            options["beam_size"] = self.beam_size
+        result = self.load().transcribe(audio, **options)
+        return result.get("text", "").strip()
+
+
+class FasterWhisperEngine(TranscriptionEngine):
+    """CTranslate2 (faster-whisper) with quantized weights – int8 by default on CPU."""
+
+    name = "faster-whisper"
+
+    def __init__(self):
+        super().__init__()
+        self.compute_type = (settings.TRANSCRIBE_COMPUTE_TYPE or "int8").strip()
+
+    @property
+    def version(self) -> str:
+        return f"{super().version}:{self.compute_type}"
+
+    def _load_model(self):
+        from faster_whisper import WhisperModel
+
+        return WhisperModel(
+            self.model_size,
+            device="cpu",
+            compute_type=self.compute_type,
+            cpu_threads=self.threads,
+        )
+
+    def transcribe(self, audio: AudioInput, language: Optional[str] = None) -> str:
+        segments, _info = self.load().transcribe(
+            audio,
+            beam_size=self.beam_size,
+            language=language or None,
+        )
+        # segments is a lazy generator – decoding happens while iterating
+        return "".join(segment.text for segment in segments).strip()
+
+
+ENGINES = {
+    WhisperEngine.name: WhisperEngine,
+    FasterWhisperEngine.name: FasterWhisperEngine,
+}
+
+_engine: Optional[TranscriptionEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_transcription_engine() -> TranscriptionEngine:
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                key = (settings.TRANSCRIBE_ENGINE or "whisper").strip().lower()
+                if key not in ENGINES:
+                    raise RuntimeError(f"Unsupported TRANSCRIBE_ENGINE: {key}")
+                _engine = ENGINES[key]()
+    return _engine
@@ -2,11 +2,10 @@ import edge_tts
 import uuid
 import os
 import asyncio
-import cloudinary
-import cloudinary.uploader
 
 
 from app.core.logger import get_logger
+from app.services.storage import get_storage
 
 logger = get_logger(__name__)
 
@@ -34,17 +33,17 @@ async def generate_tts(text: str, voice: str) -> str:
         print("[Backend 🎤] TTSService: MP3 save ho gaya –", file_path)
         logger.info("TTS generated: %s", file_path)
 
-        # saving in cloudinary 
-        result = cloudinary.uploader.upload(
+        # saving in object storage (Cloudinary by default) – runs off the event loop
+        stored = await get_storage().upload_file(
             file_path,
-            resource_type="video",
             folder="ai-interview/tts",
+            resource_type="video",
             )
-        print("[Backend 🎤] TTSService: Cloudinary upload ho gaya –", result)
+        print("[Backend 🎤] TTSService: Storage upload ho gaya –", stored.url)
         os.remove(file_path)  # local file delete kar do, ab cloud mein safe hai
         return {
-                "audio_url": result["secure_url"],
-                "public_id": result["public_id"]
+                "audio_url": stored.url,
+                "public_id": stored.key
             }
 
     except Exception:
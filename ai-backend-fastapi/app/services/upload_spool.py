@@ -0,0 +1,145 @@
+"""
+Local spool for uploaded answer videos.
+
+The API writes the upload to SPOOL_DIR and queues two jobs on that copy right away: the
+analysis and the object-storage upload (Cloudinary by default). Both need the file, so
+the answer lists them in `spool_holders` and whichever releases last deletes it. Workers
+on other nodes need SPOOL_DIR on shared scratch (the storage job can only run where the
+file is; analysis falls back to downloading the stored copy).
+
+SPOOL_DIR is outside uploads/ on purpose: that directory is served publicly at /uploads,
+and these are raw candidate videos.
+
+Files nobody releases – holders released on a node that can't see the file, answers that
+failed for good – are removed by sweep_spool() once older than SPOOL_MAX_AGE_HOURS.
+"""
+import os
+import time
+
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+from app.services.storage import get_storage
+
+logger = get_logger(__name__)
+
+SPOOL_DIR = "scratch/videos"
+os.makedirs(SPOOL_DIR, exist_ok=True)
+
+HOLDER_STORAGE = "storage"
+HOLDER_ANALYSIS = "analysis"
+SPOOL_HOLDERS = [HOLDER_STORAGE, HOLDER_ANALYSIS]
+
+
+def spool_path_for(upload_id: str, ext: str = ".webm") -> str:
+    return os.path.join(SPOOL_DIR, f"{upload_id}{ext}")
+
+
+def release_spool(interview_id: str, question_id: str, path: str, holder: str):
+    """Drop `holder`'s claim on the spooled file; the last holder deletes it."""
+    answer = get_sync_db().interview_answers.find_one_and_update(
+        {"session_id": interview_id, "question_id": question_id, "spool_path": path},
+        {"$pull": {"spool_holders": holder}},
+        projection={"spool_holders": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if answer is not None and answer.get("spool_holders"):
+        return  # the other party still needs it
+
+    if answer is not None:
+        get_sync_db().interview_answers.update_one(
+            {"_id": answer["_id"], "spool_path": path},
+            {"$unset": {"spool_path": "", "spool_holders": ""}},
+        )
+    # No spool record (older answers / re-uploaded meanwhile): the file is ours alone
+    if os.path.exists(path):
+        os.remove(path)
+        logger.info("Spool file removed: %s", path)
+
+
+def store_spooled_video(interview_id: str, question_id: str, upload_id: str, path: str):
+    """
+    store_video job (worker): upload the spooled video to object storage and record the URL.
+    Errors propagate so the job queue retries; mark_storage_failed() runs once it gives up.
+    """
+    db = get_sync_db()
+    answer_filter = {"session_id": interview_id, "question_id": question_id, "upload_id": upload_id}
+
+    if db.interview_answers.find_one({**answer_filter, "storage_status": "stored"}, {"_id": 1}):
+        release_spool(interview_id, question_id, path, HOLDER_STORAGE)
+        return  # an earlier attempt got this far
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Spooled upload not visible on this node: {path}")
+
+    stored = get_storage().upload_file_sync(
+        path,
+        folder=f"ai-interview/interviews/{interview_id}",
+        resource_type="video",
+    )
+    db.interview_answers.update_one(
+        answer_filter,
+        {"$set": {
+            "video_path": stored.url,
+            "video_public_id": stored.key,
+            "storage_status": "stored",
+        },
+        "$unset": {"storage_error": ""}},
+    )
+    print("[Backend 🎤] Spool: Storage pe save ho gaya –", stored.url)
+    logger.info("Spooled video stored | question=%s | url=%s", question_id, stored.url)
+    release_spool(interview_id, question_id, path, HOLDER_STORAGE)
+
+
+def mark_storage_failed(interview_id: str, question_id: str, upload_id: str, error: str):
+    """The store_video job gave up – the spool file is kept, it is now the only copy."""
+    print("[Backend 🎤] Spool: Storage upload fail – local copy rakh li!")
+    get_sync_db().interview_answers.update_one(
+        {"session_id": interview_id, "question_id": question_id, "upload_id": upload_id},
+        {"$set": {"storage_status": "failed", "storage_error": error}},
+    )
+
+
+def _sweepable(answer) -> bool:
+    if answer is None or not answer.get("spool_holders"):
+        return True  # re-uploaded meanwhile, or every holder released (maybe on another node)
+    # Failed for good: retry-analysis can use the stored copy. Without one, keep the only copy.
+    return answer.get("status") == "failed" and answer.get("storage_status") == "stored"
+
+
+def sweep_spool() -> int:
+    """
+    Delete spool files older than SPOOL_MAX_AGE_HOURS that no answer still needs. Run on
+    every node that has its own SPOOL_DIR (the API runs it periodically). Returns files removed.
+    """
+    db = get_sync_db()
+    cutoff = time.time() - settings.SPOOL_MAX_AGE_HOURS * 3600
+    removed = 0
+    for name in os.listdir(SPOOL_DIR):
+        path = os.path.join(SPOOL_DIR, name)
+        try:
+            if not os.path.isfile(path) or os.path.getmtime(path) > cutoff:
+                continue
+            answer = db.interview_answers.find_one(
+                {"spool_path": path},
+                {"spool_holders": 1, "status": 1, "storage_status": 1},
+            )
+            if not _sweepable(answer):
+                continue
+            if answer is not None:
+                db.interview_answers.update_one(
+                    {"_id": answer["_id"], "spool_path": path},
+                    {"$unset": {"spool_path": "", "spool_holders": ""}},
+                )
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            continue  # another process swept it first
+        except Exception:
+            logger.exception("Spool sweep failed for %s", path)
+
+    if removed:
+        print("[Backend 🎤] Spool: Purani", removed, "spool files saaf kar di!")
+        logger.info("Spool sweep removed %s files | max_age_hours=%s", removed, settings.SPOOL_MAX_AGE_HOURS)
+    return removed
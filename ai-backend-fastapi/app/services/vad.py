@@ -0,0 +1,96 @@
+import wave
+from typing import List, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+
+
+def load_wav(audio_path: str) -> np.ndarray:
+    """Read the 16 kHz mono s16 WAV written by ffmpeg as float32 samples in [-1, 1]."""
+    with wave.open(audio_path, "rb") as wav:
+        if wav.getnchannels() != 1 or wav.getsampwidth() != 2 or wav.getframerate() != SAMPLE_RATE:
+            raise ValueError(
+                f"Expected 16 kHz mono s16 WAV, got {wav.getframerate()} Hz / "
+                f"{wav.getnchannels()} ch / {wav.getsampwidth() * 8} bit: {audio_path}"
+            )
+        pcm = wav.readframes(wav.getnframes())
+    return np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+FRAME_LEN = SAMPLE_RATE * FRAME_MS // 1000
+
+
+def speech_mask(samples: np.ndarray) -> np.ndarray:
+    """
+    Energy-based VAD, one bool per 30 ms frame. A frame is speech if its level is above
+    both the absolute floor (VAD_MIN_DB) and the clip's own noise floor + VAD_MARGIN_DB.
+
+    The noise floor is the 10th-percentile frame level; when less than ~10% of the clip is
+    quiet that percentile lands on speech, so the relative threshold is capped at
+    VAD_MAX_THRESHOLD_DB and a clip is only dropped entirely if it is below VAD_MIN_DB.
+    """
+    n_frames = len(samples) // FRAME_LEN
+    if n_frames == 0:
+        return np.zeros(0, dtype=bool)
+
+    frames = samples[: n_frames * FRAME_LEN].reshape(n_frames, FRAME_LEN)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1) + 1e-12)
+    level_db = 20 * np.log10(rms)
+
+    noise_floor_db = float(np.percentile(level_db, 10))
+    relative_db = min(noise_floor_db + settings.VAD_MARGIN_DB, settings.VAD_MAX_THRESHOLD_DB)
+    threshold_db = max(settings.VAD_MIN_DB, relative_db)
+    is_speech = level_db > threshold_db
+    if not is_speech.any():
+        # Steady speech with (almost) no pauses – nothing to trim against, keep what's audible
+        is_speech = level_db > settings.VAD_MIN_DB
+    return is_speech
+
+
+def speech_spans(samples: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) sample ranges of speech, padded and with short pauses merged."""
+    is_speech = speech_mask(samples)
+    n_frames = len(is_speech)
+
+    pad = settings.VAD_PAD_MS // FRAME_MS
+    max_gap = settings.VAD_MIN_SILENCE_MS // FRAME_MS
+
+    spans: List[Tuple[int, int]] = []
+    for idx in np.flatnonzero(is_speech):
+        start, end = max(0, idx - pad), min(n_frames, idx + 1 + pad)
+        if spans and start - spans[-1][1] <= max_gap:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+
+    return [(start * FRAME_LEN, end * FRAME_LEN) for start, end in spans]
+
+
+def trim_silence(samples: np.ndarray) -> np.ndarray:
+    """
+    Drop leading/trailing silence and long pauses. Returns an empty array when
+    the clip has less than VAD_MIN_SPEECH_MS of speech (caller skips transcription).
+    """
+    spans = speech_spans(samples)
+    speech_ms = sum(end - start for start, end in spans) * 1000 // SAMPLE_RATE
+    if speech_ms < settings.VAD_MIN_SPEECH_MS:
+        print("[Backend 🎤] VAD: Koi bol hi nahi raha – transcription skip!")
+        logger.info("VAD: no speech detected (%d ms)", speech_ms)
+        return np.zeros(0, dtype=np.float32)
+
+    trimmed = np.concatenate([samples[start:end] for start, end in spans]).astype(np.float32, copy=False)
+    print("[Backend 🎤] VAD: Silence hata diya –", len(samples) // SAMPLE_RATE, "s se", len(trimmed) // SAMPLE_RATE, "s audio bacha!")
+    logger.info(
+        "VAD: kept %.1fs of %.1fs in %d spans",
+        len(trimmed) / SAMPLE_RATE,
+        len(samples) / SAMPLE_RATE,
+        len(spans),
+    )
+    return trimmed
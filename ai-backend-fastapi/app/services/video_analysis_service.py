@@ -1,21 +1,87 @@
 import os
-import cv2
-import whisper
+import subprocess
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 import ffmpeg
-from deepface import DeepFace
 
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.services.transcription import AudioInput, get_transcription_engine, normalize_language
+from app.services.vad import load_wav, trim_silence
 
 logger = get_logger(__name__)
 
-# Load Whisper model once (important for performance)
-whisper_model = whisper.load_model("base")
+# ML libraries (whisper/torch, deepface/tensorflow, cv2) are imported lazily:
+# API replicas that only enqueue jobs never pay their import time or RSS.
+_model_lock = threading.Lock()
 
 
-def extract_audio(video_path: str, audio_path: str):
-    print("[Backend 🎤] VideoAnalysis: Video se audio nikal rahe hain – ffmpeg chal raha hai!", video_path[:80])
-    logger.info("Extracting audio from video: %s", video_path)
+def transcript_version(language: Optional[str] = None) -> str:
+    """Everything that changes transcribe_audio() output – part of the analysis cache key."""
+    vad = (
+        f"vad{settings.VAD_MIN_DB}/{settings.VAD_MARGIN_DB}/{settings.VAD_MAX_THRESHOLD_DB}/{settings.VAD_PAD_MS}/"
+        f"{settings.VAD_MIN_SILENCE_MS}/{settings.VAD_MIN_SPEECH_MS}"
+        if settings.VAD_ENABLED else "novad"
+    )
+    language = _pinned_language(language) or "auto"
+    return f"{get_transcription_engine().version}:{vad}:{language}"
+
+
+def _pinned_language(language: Optional[str]) -> Optional[str]:
+    """Session language, else TRANSCRIBE_LANGUAGE; unsupported values mean auto-detect."""
+    value = language or settings.TRANSCRIBE_LANGUAGE
+    try:
+        return normalize_language(value)
+    except ValueError:
+        # Sessions created before the API validated the code – don't fail every attempt
+        logger.warning("Unsupported transcription language %r – auto-detecting", value)
+        return None
+
+
+def emotion_version() -> str:
+    """Everything that changes emotion analysis output – part of the analysis cache key."""
+    mode = (settings.EMOTION_SAMPLING_MODE or "fps").strip().lower()
+    if mode == "fps":
+        mode = f"fps{settings.EMOTION_SAMPLES_PER_SECOND}"
+    elif mode == "every_n":
+        mode = f"every{settings.EMOTION_FRAME_STEP}"
+    # "even": samples spread over the whole answer, "spread": the first EMOTION_MIN_FRAMES of
+    # them are never skipped as duplicates; batch size sets where early stop can trigger
+    adaptive = (
+        f"even:spread:cap{settings.EMOTION_MAX_FRAMES}:min{settings.EMOTION_MIN_FRAMES}:"
+        f"dup{settings.EMOTION_DUP_HAMMING}:z{settings.EMOTION_STOP_Z}:batch{settings.EMOTION_BATCH_SIZE}"
+    )
+    return f"{mode}:{settings.EMOTION_DETECTOR_BACKEND}:{EMOTION_FRAME_MAX_WIDTH}:{adaptive}"
+
+
+def _deepface():
+    from deepface import DeepFace
+
+    return DeepFace
+
+
+def preload_models():
+    """Warm up the transcription engine and the emotion model (analysis workers call this at startup)."""
+    get_transcription_engine().load()
+    _get_emotion_model()
+
+
+# Sampled frames are downscaled before DeepFace (it works on small face crops anyway)
+EMOTION_FRAME_MAX_WIDTH = 640
+# Last bytes of ffmpeg's stderr kept for the error message
+FFMPEG_STDERR_TAIL_BYTES = 8192
 
+# Output order of DeepFace's facial-expression model
+EMOTION_LABELS = ["angry", "disgust", "fear", "happy", "sad", "surprise", "neutral"]
+
+# Keras emotion model, built on first use and reused for every batch
+_emotion_model = None
+_batched_emotion_supported = True
+
+
+def _check_video_file(video_path: str):
     if not os.path.isfile(video_path):
         msg = f"Video file not found: {video_path}"
         logger.error(msg)
@@ -25,6 +91,20 @@ def extract_audio(video_path: str, audio_path: str):
         logger.error(msg)
         raise ValueError(msg)
 
+
+def _ffmpeg_error_message(e: Exception) -> str:
+    stderr = ""
+    if getattr(e, "stderr", None):
+        stderr = (e.stderr if isinstance(e.stderr, str) else (e.stderr or b"").decode("utf-8", errors="replace")).strip()
+    return f"ffmpeg error: {stderr or str(e)}"
+
+
+def extract_audio(video_path: str, audio_path: str):
+    print("[Backend 🎤] VideoAnalysis: Video se audio nikal rahe hain – ffmpeg chal raha hai!", video_path[:80])
+    logger.info("Extracting audio from video: %s", video_path)
+
+    _check_video_file(video_path)
+
     try:
         (
             ffmpeg
@@ -36,78 +116,520 @@ def extract_audio(video_path: str, audio_path: str):
         print("[Backend 🎤] VideoAnalysis: Audio nikal liya – WAV save ho gaya!")
         logger.info("Audio extracted successfully")
     except Exception as e:
-        stderr = ""
-        if getattr(e, "stderr", None):
-            stderr = (e.stderr if isinstance(e.stderr, str) else (e.stderr or b"").decode("utf-8", errors="replace")).strip()
-        msg = f"ffmpeg error: {stderr or str(e)}"
+        msg = _ffmpeg_error_message(e)
         print("[Backend 🎤] VideoAnalysis: FFmpeg ne fail kiya –", msg[:200])
         logger.exception("Audio extraction failed: %s", msg[:500])
         raise RuntimeError(msg) from e
 
 
-def transcribe_audio(audio_path: str) -> str:
-    print("[Backend 🎤] VideoAnalysis: Whisper se bol sun rahe hain – transcript banayenge!")
-    logger.info("Transcribing audio with Whisper")
+def decode_audio_samples(media_path: str, start_seconds: float = 0.0, allow_truncated: bool = False) -> np.ndarray:
+    """
+    16 kHz mono float32 samples from `start_seconds` to the end, decoded in memory.
+    allow_truncated: keep what was decoded even if ffmpeg fails on an incomplete
+    tail (a recording that is still being uploaded in chunks).
+    """
+    _check_video_file(media_path)
     try:
-        result = whisper_model.transcribe(audio_path)
-        text = result.get("text", "").strip()
+        out, _ = (
+            ffmpeg
+            .input(media_path)
+            .output("pipe:", format="s16le", acodec="pcm_s16le", ac=1, ar=16000, ss=start_seconds)
+            .global_args("-loglevel", "error")
+            .run(capture_stdout=True, capture_stderr=True)
+        )
+    except ffmpeg.Error as e:
+        if not (allow_truncated and e.stdout):
+            msg = _ffmpeg_error_message(e)
+            logger.error("Audio decode failed: %s", msg[:500])
+            raise RuntimeError(msg) from e
+        out = e.stdout
+    usable = len(out) - len(out) % 2
+    return np.frombuffer(out[:usable], dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def _probe_duration(info: dict, stream: dict) -> Optional[float]:
+    """Seconds, or None – browser MediaRecorder WebM usually has no duration in its header."""
+    for value in (info.get("format", {}).get("duration"), stream.get("duration")):
+        try:
+            duration = float(value)
+        except (TypeError, ValueError):
+            continue
+        if np.isfinite(duration) and duration > 0:
+            return duration
+    return None
+
+
+def _probe_video(video_path: str) -> Tuple[int, int, Optional[float]]:
+    """
+    (width, height, duration) of the sampled frames: display orientation, capped at
+    EMOTION_FRAME_MAX_WIDTH, even dims; duration in seconds if the container knows it.
+    """
+    try:
+        info = ffmpeg.probe(video_path)
+    except Exception as e:
+        raise RuntimeError(_ffmpeg_error_message(e)) from e
+
+    stream = next((st for st in info.get("streams", []) if st.get("codec_type") == "video"), None)
+    if not stream or not stream.get("width") or not stream.get("height"):
+        raise RuntimeError(f"No video stream found: {video_path}")
+
+    width, height = int(stream["width"]), int(stream["height"])
+    rotation = stream.get("tags", {}).get("rotate")
+    for side_data in stream.get("side_data_list", []):
+        rotation = side_data.get("rotation", rotation)
+    if rotation is not None and abs(int(float(rotation))) % 180 == 90:
+        width, height = height, width  # ffmpeg autorotates on decode
+
+    out_w = min(width, EMOTION_FRAME_MAX_WIDTH)
+    out_h = max(2, int(round(height * out_w / width / 2)) * 2)
+    return out_w - out_w % 2, out_h, _probe_duration(info, stream)
+
+
+def _sampled_input(video_path: str):
+    mode = (settings.EMOTION_SAMPLING_MODE or "fps").strip().lower()
+    if mode == "keyframes":
+        # Decoder drops non-key frames before decoding them at all.
+        return ffmpeg.input(video_path, skip_frame="nokey")
+    return ffmpeg.input(video_path)
+
+
+def _sampled_frames_output(source, width: int, height: int, duration: Optional[float] = None):
+    """
+    Raw BGR frames on stdout, sampled per settings.EMOTION_SAMPLING_MODE. With a known
+    duration, samples closer together than duration / EMOTION_MAX_FRAMES are dropped in
+    ffmpeg, so at most ~EMOTION_MAX_FRAMES frames spread over the whole answer reach Python.
+    """
+    mode = (settings.EMOTION_SAMPLING_MODE or "fps").strip().lower()
+    video = source.video
+    if mode == "fps":
+        # Dropped frames skip scaling/colour conversion and never reach Python.
+        video = video.filter("fps", fps=settings.EMOTION_SAMPLES_PER_SECOND)
+    elif mode == "every_n":
+        video = video.filter("framestep", step=settings.EMOTION_FRAME_STEP)
+    elif mode != "keyframes":
+        raise ValueError(f"Unsupported EMOTION_SAMPLING_MODE: {settings.EMOTION_SAMPLING_MODE}")
+    if duration:
+        interval = duration / max(1, settings.EMOTION_MAX_FRAMES)
+        video = video.filter("select", f"isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:.3f})")
+
+    return (
+        video
+        .filter("scale", width, height)
+        .output("pipe:", format="rawvideo", pix_fmt="bgr24", vsync="vfr")
+    )
+
+
+def _read_frames(process, width: int, height: int) -> Iterator[np.ndarray]:
+    """
+    Yield frames from a running ffmpeg process; raises RuntimeError if ffmpeg failed or is
+    still running after EMOTION_DECODE_TIMEOUT_SECONDS (killed – the job fails instead of hanging).
+    """
+    frame_bytes = width * height * 3
+    returncode = None
+    stderr_tail = bytearray()
+
+    def _drain_stderr():
+        # A damaged upload can log an error per frame – unread, the pipe fills and ffmpeg blocks
+        for line in iter(process.stderr.readline, b""):
+            stderr_tail.extend(line)
+            del stderr_tail[:-FFMPEG_STDERR_TAIL_BYTES]
+
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        process.kill()
+
+    stderr_thread = threading.Thread(target=_drain_stderr, daemon=True)
+    stderr_thread.start()
+    watchdog = threading.Timer(settings.EMOTION_DECODE_TIMEOUT_SECONDS, _kill)
+    watchdog.daemon = True
+    watchdog.start()
+    try:
+        while True:
+            buf = process.stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+            yield np.frombuffer(buf, np.uint8).reshape(height, width, 3)
+    finally:
+        watchdog.cancel()
+        # Also runs when the consumer stops early – don't leave ffmpeg blocked on a full pipe.
+        if process.poll() is None and process.stdout.read(1):
+            process.kill()
+            returncode = 0
+        process.stdout.close()
+        stderr_thread.join()
+        process.stderr.close()
+        waited = process.wait()
+        if returncode is None:
+            returncode = waited
+
+    stderr = stderr_tail.decode("utf-8", errors="replace").strip()
+    if timed_out.is_set():
+        msg = f"ffmpeg timed out after {settings.EMOTION_DECODE_TIMEOUT_SECONDS}s"
+    elif returncode != 0:
+        msg = f"ffmpeg error: {stderr or f'exit code {returncode}'}"
+    else:
+        return
+    print("[Backend 🎤] VideoAnalysis: FFmpeg ne fail kiya –", msg[:200])
+    logger.error("Frame decode failed: %s", msg[:500])
+    raise RuntimeError(msg)
+
+
+def iter_sampled_frames(video_path: str) -> Iterator[np.ndarray]:
+    """Decode only the sampled frames of a video (no audio), thinned by _select_frames()."""
+    _check_video_file(video_path)
+    width, height, duration = _probe_video(video_path)
+    process = (
+        _sampled_frames_output(_sampled_input(video_path), width, height, duration)
+        .global_args("-loglevel", "error")
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    yield from _select_frames(_read_frames(process, width, height), thinned=duration is not None)
+
+
+def decode_audio_and_frames(video_path: str, audio_path: str) -> List[np.ndarray]:
+    """
+    Single demux/decode pass over the answer video.
+    One ffmpeg process writes the 16 kHz mono WAV for Whisper and streams the
+    sampled, downscaled BGR frames for DeepFace. Frames are thinned while reading
+    (_select_frames), so at most 2 * EMOTION_MAX_FRAMES are held in memory.
+    """
+    print("[Backend 🎤] VideoAnalysis: Ek hi pass mein audio + frames nikal rahe hain –", video_path[:80])
+    logger.info("Decoding audio + frames in one pass: %s", video_path)
+
+    _check_video_file(video_path)
+    width, height, duration = _probe_video(video_path)
+
+    source = _sampled_input(video_path)
+    audio_out = source.audio.output(audio_path, ac=1, ar=16000)
+    frames_out = _sampled_frames_output(source, width, height, duration)
+
+    process = (
+        ffmpeg.merge_outputs(audio_out, frames_out)
+        .global_args("-loglevel", "error")
+        .overwrite_output()
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+    frames = list(_select_frames(_read_frames(process, width, height), thinned=duration is not None))
+
+    print("[Backend 🎤] VideoAnalysis: Audio WAV +", len(frames), "frames ready!")
+    logger.info("Decoded audio + %d sampled frames", len(frames))
+    return frames
+
+
+def decode_samples_and_frames(video_path: str) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    In-memory variant of decode_audio_and_frames(): the same single ffmpeg pass, but the
+    16 kHz mono PCM goes to an extra pipe and comes back as float32 samples – no WAV file
+    is written, read back, or left behind if the job fails.
+    """
+    print("[Backend 🎤] VideoAnalysis: Ek hi pass mein audio (memory) + frames nikal rahe hain –", video_path[:80])
+    logger.info("Decoding in-memory audio + frames in one pass: %s", video_path)
+
+    _check_video_file(video_path)
+    width, height, duration = _probe_video(video_path)
+
+    audio_read_fd, audio_write_fd = os.pipe()
+    try:
+        source = _sampled_input(video_path)
+        audio_out = source.audio.output(
+            f"pipe:{audio_write_fd}", format="s16le", acodec="pcm_s16le", ac=1, ar=16000
+        )
+        frames_out = _sampled_frames_output(source, width, height, duration)
+        args = (
+            ffmpeg.merge_outputs(audio_out, frames_out)
+            .global_args("-loglevel", "error")
+            .compile()
+        )
+        process = subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            pass_fds=(audio_write_fd,),
+        )
+    except Exception:
+        os.close(audio_read_fd)
+        raise
+    finally:
+        os.close(audio_write_fd)  # child has its own copy; EOF arrives when ffmpeg exits
+
+    # Audio and frames are interleaved by ffmpeg – drain both pipes concurrently
+    pcm = bytearray()
+
+    def _drain_audio():
+        with os.fdopen(audio_read_fd, "rb") as audio_pipe:
+            for block in iter(lambda: audio_pipe.read(1 << 16), b""):
+                pcm.extend(block)
+
+    audio_thread = threading.Thread(target=_drain_audio, daemon=True)
+    audio_thread.start()
+    try:
+        frames = list(_select_frames(_read_frames(process, width, height), thinned=duration is not None))
+    finally:
+        audio_thread.join()
+
+    usable = len(pcm) - len(pcm) % 2
+    samples = np.frombuffer(bytes(pcm[:usable]), dtype=np.int16).astype(np.float32) / 32768.0
+
+    print("[Backend 🎤] VideoAnalysis: Audio", round(len(samples) / 16000, 1), "s (memory) +", len(frames), "frames ready!")
+    logger.info("Decoded %.1fs audio in memory + %d sampled frames", len(samples) / 16000, len(frames))
+    return samples, frames
+
+
+def transcribe_audio(audio: AudioInput, language: Optional[str] = None) -> str:
+    """
+    `audio` is a 16 kHz WAV path or float32 samples.
+    `language` pins the spoken language (skips detection); defaults to TRANSCRIBE_LANGUAGE.
+    """
+    engine = get_transcription_engine()
+    language = _pinned_language(language)
+
+    if settings.VAD_ENABLED:
+        samples = load_wav(audio) if isinstance(audio, str) else audio
+        audio = trim_silence(samples)
+        if audio.size == 0:
+            # Silent clip: nothing to transcribe (and no hallucinated text)
+            return ""
+
+    print("[Backend 🎤] VideoAnalysis:", engine.name, "se bol sun rahe hain – transcript banayenge! language =", language or "auto")
+    logger.info("Transcribing audio | engine=%s | language=%s", engine.version, language or "auto")
+    try:
+        text = engine.transcribe(audio, language=language)
         print("[Backend 🎤] VideoAnalysis: Transcript aa gaya –", len(text), "characters!")
         logger.info("Transcription complete (%d chars)", len(text))
         return text
     except Exception:
-        print("[Backend 🎤] VideoAnalysis: Whisper ne fail kiya – transcript nahi bana!")
-        logger.exception("Whisper transcription failed")
+        print("[Backend 🎤] VideoAnalysis: Transcription fail – transcript nahi bana!")
+        logger.exception("Transcription failed")
         raise
 
 
-def analyze_emotion(video_path: str):
-    print("[Backend 🎤] VideoAnalysis: Video frames se emotion dekh rahe hain – DeepFace chal raha hai!")
-    logger.info("Analyzing emotion from video frames")
+def _frame_emotion(frame: np.ndarray):
+    try:
+        result = _deepface().analyze(
+            frame,
+            actions=["emotion"],
+            enforce_detection=False,
+            silent=True
+        )
+        return result[0]["dominant_emotion"]
+    except Exception:
+        return None
 
-    cap = cv2.VideoCapture(video_path)
-    emotions = []
-    frame_count = 0
 
-    try:
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
+def _summarize_emotions(emotions: List[str]) -> Tuple[str, str]:
+    if not emotions:
+        print("[Backend 🎤] VideoAnalysis: Koi emotion nahi mila – neutral/low de rahe hain!")
+        logger.warning("No emotions detected")
+        return "neutral", "low"
 
-            frame_count += 1
+    dominant = max(set(emotions), key=emotions.count)
+    confidence = "high" if dominant in ["happy", "neutral"] else "low"
+    print("[Backend 🎤] VideoAnalysis: Emotion mil gaya –", dominant, "confidence =", confidence)
+    logger.info(
+        "Emotion analysis complete | emotion=%s | confidence=%s",
+        dominant, confidence
+    )
+    return dominant, confidence
 
-            # Analyze every 15th frame (performance)
-            if frame_count % 15 == 0:
+
+def _get_emotion_model():
+    global _emotion_model
+    if _emotion_model is None:
+        with _model_lock:
+            if _emotion_model is None:
+                DeepFace = _deepface()
                 try:
-                    result = DeepFace.analyze(
-                        frame,
-                        actions=["emotion"],
-                        enforce_detection=False,
-                        silent=True
-                    )
-                    emotions.append(result[0]["dominant_emotion"])
-                except Exception:
-                    continue
-
-        cap.release()
-
-        if not emotions:
-            print("[Backend 🎤] VideoAnalysis: Koi emotion nahi mila – neutral/low de rahe hain!")
-            logger.warning("No emotions detected")
-            return "neutral", "low"
-
-        dominant = max(set(emotions), key=emotions.count)
-        confidence = "high" if dominant in ["happy", "neutral"] else "low"
-        print("[Backend 🎤] VideoAnalysis: Emotion mil gaya –", dominant, "confidence =", confidence)
-        logger.info(
-            "Emotion analysis complete | emotion=%s | confidence=%s",
-            dominant, confidence
+                    built = DeepFace.build_model(task="facial_attribute", model_name="Emotion")
+                except TypeError:
+                    built = DeepFace.build_model("Emotion")  # deepface < 0.0.93
+                # Newer deepface wraps the keras model in a client object
+                _emotion_model = getattr(built, "model", built)
+    return _emotion_model
+
+
+def _face_input(frame: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Detect the face in one frame and prepare the 48x48 grayscale model input,
+    the same way DeepFace.analyze does (pad to square, grayscale, resize, 0..1).
+    """
+    try:
+        faces = _deepface().extract_faces(
+            frame,
+            detector_backend=settings.EMOTION_DETECTOR_BACKEND,
+            enforce_detection=False,
+            align=True,
         )
+    except Exception:
+        return None
+    if not faces:
+        return None
 
-        return dominant, confidence
+    face = np.asarray(faces[0]["face"], dtype=np.float32)  # RGB, 0..1
+    if face.size == 0:
+        return None
+    if face.max() > 1:
+        face = face / 255.0
+
+    h, w = face.shape[:2]
+    side = max(h, w)
+    square = np.zeros((side, side, 3), dtype=np.float32)
+    top, left = (side - h) // 2, (side - w) // 2
+    square[top:top + h, left:left + w] = face
+
+    import cv2
+
+    gray = cv2.cvtColor(square, cv2.COLOR_RGB2GRAY)
+    return cv2.resize(gray, (48, 48))
+
+
+def _classify_batch(frames: List[np.ndarray]) -> List[str]:
+    """Face detection per frame, then ONE emotion forward pass for the whole batch."""
+    inputs = [x for x in (_face_input(frame) for frame in frames) if x is not None]
+    if not inputs:
+        return []
+
+    batch = np.stack(inputs)[..., np.newaxis]  # (N, 48, 48, 1)
+    predictions = _get_emotion_model().predict(batch, verbose=0)
+    return [EMOTION_LABELS[int(i)] for i in np.argmax(predictions, axis=1)]
+
+
+def _dhash(frame: np.ndarray) -> int:
+    """64-bit difference hash – near-identical frames differ in only a few bits."""
+    import cv2
+
+    small = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _thin_evenly(frames: Iterable[np.ndarray], cap: int) -> List[np.ndarray]:
+    """
+    `cap` frames evenly spread over the whole stream without knowing its length: every
+    k-th frame is buffered, k doubling whenever more than 2 * cap are held (so at least
+    cap remain), then cap are picked evenly from the buffer.
+    """
+    kept: List[np.ndarray] = []
+    stride = 1
+    for index, frame in enumerate(frames):
+        if index % stride:
+            continue
+        kept.append(frame)
+        if len(kept) > 2 * cap:
+            kept = kept[::2]
+            stride *= 2
+    if len(kept) <= cap:
+        return kept
+    return [kept[int(i)] for i in np.round(np.linspace(0, len(kept) - 1, cap))]
+
+
+def _select_frames(frames: Iterable[np.ndarray], thinned: bool) -> Iterator[np.ndarray]:
+    """
+    Frames worth analyzing: at most EMOTION_MAX_FRAMES spread over the whole answer,
+    skipping ones that look the same as the last analyzed frame – except for
+    EMOTION_MIN_FRAMES evenly spread samples, which are always analyzed. The hash covers
+    the whole frame, so a seated candidate in front of a static background would otherwise
+    collapse to a single frame.
+
+    thinned: ffmpeg already spaced the samples by the probed duration (see
+    _sampled_frames_output). Otherwise the length is unknown and frames are thinned with
+    _thin_evenly first. Every caller (single-pass decode or streaming analyze_emotion) goes
+    through here, so a video gets the same frames – and the same cached emotion – either
+    way. The samples are read to the end before the first one is yielded (the spread needs
+    their count); the single-pass decode must read them all anyway for the audio.
+    """
+    cap = max(1, settings.EMOTION_MAX_FRAMES)
+    if thinned:
+        frames = list(frames)[:cap]  # rounding in ffmpeg's select can let one extra through
+    else:
+        frames = _thin_evenly(frames, cap)
+
+    spread = min(len(frames), max(1, settings.EMOTION_MIN_FRAMES))
+    always = {int(i) for i in np.round(np.linspace(0, len(frames) - 1, spread))} if frames else set()
+
+    last_hash = None
+    for index, frame in enumerate(frames):
+        if settings.EMOTION_DUP_HAMMING > 0:
+            frame_hash = _dhash(frame)
+            duplicate = last_hash is not None and bin(frame_hash ^ last_hash).count("1") <= settings.EMOTION_DUP_HAMMING
+            if duplicate and index not in always:
+                continue
+            last_hash = frame_hash
+        yield frame
+
+
+def _vote_settled(emotions: List[str]) -> bool:
+    """True once the leading emotion can't plausibly be overtaken (sign test vs runner-up)."""
+    if len(emotions) < max(1, settings.EMOTION_MIN_FRAMES):
+        return False
+    counts = sorted((emotions.count(e) for e in set(emotions)), reverse=True)
+    leader = counts[0]
+    runner_up = counts[1] if len(counts) > 1 else 0
+    return (leader - runner_up) / ((leader + runner_up) ** 0.5) >= settings.EMOTION_STOP_Z
+
+
+def _classify_frames(frames: Iterable[np.ndarray]) -> List[str]:
+    """Emotion per selected frame, in batches, stopping once the vote is settled."""
+    batch_size = max(1, settings.EMOTION_BATCH_SIZE)
+    emotions: List[str] = []
+    batch: List[np.ndarray] = []
+
+    def flush():
+        global _batched_emotion_supported
+        if _batched_emotion_supported:
+            try:
+                emotions.extend(_classify_batch(batch))
+                batch.clear()
+                return
+            except (ImportError, AttributeError):
+                # Installed deepface lacks the pieces the batched path needs – per-frame from now on
+                logger.exception("Batched emotion inference unsupported, using per-frame analyze")
+                _batched_emotion_supported = False
+            except Exception:
+                # Transient (OOM, a bad frame) – only this batch goes per-frame
+                logger.exception("Batched emotion inference failed, falling back to per-frame for this batch")
+        for frame in batch:
+            emotion = _frame_emotion(frame)
+            if emotion is not None:
+                emotions.append(emotion)
+        batch.clear()
+
+    for frame in frames:
+        batch.append(frame)
+        if len(batch) >= batch_size:
+            flush()
+            if _vote_settled(emotions):
+                logger.info("Emotion vote settled after %d frames – stopping early", len(emotions))
+                break
+    if batch:
+        flush()
+    return emotions
+
+
+def classify_emotion_frames(frames: List[np.ndarray]) -> Tuple[str, str]:
+    """Dominant emotion/confidence over frames already selected by decode_audio_and_frames()."""
+    print("[Backend 🎤] VideoAnalysis: Sampled frames se emotion dekh rahe hain – DeepFace batch mein chal raha hai!")
+    logger.info("Analyzing emotion from %d sampled frames", len(frames))
+    return _summarize_emotions(_classify_frames(frames))
+
+
+def analyze_emotion(video_path: str):
+    print("[Backend 🎤] VideoAnalysis: Video frames se emotion dekh rahe hain – DeepFace chal raha hai!")
+    logger.info(
+        "Analyzing emotion from video frames | sampling=%s",
+        settings.EMOTION_SAMPLING_MODE,
+    )
+
+    try:
+        # Only sampled frames are decoded/converted (see EMOTION_SAMPLING_MODE)
+        frames = iter_sampled_frames(video_path)
+        try:
+            return _summarize_emotions(_classify_frames(frames))
+        finally:
+            frames.close()  # stops ffmpeg if it is still running
 
     except Exception:
-        cap.release()
         print("[Backend 🎤] VideoAnalysis: Emotion analysis fail – kuch toot gaya!")
         logger.exception("Emotion analysis failed")
         raise
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """One pooled session per worker process – keeps TLS connections to the CDN alive between jobs."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def download_video(url: str, dest_path: str) -> int:
+    """
+    Stream `url` into `dest_path` chunk by chunk (memory stays flat regardless of video size).
+    On a dropped connection, resumes from the bytes already written using a Range request.
+    Returns the number of bytes written.
+    """
+    print("[Backend 🎤] Download: Video stream kar rahe hain –", url[:80])
+    logger.info("Downloading video: %s", url)
+
+    part_path = dest_path + ".part"
+    written = 0
+    resumes = 0
+    session = _get_session()
+
+    try:
+        with open(part_path, "wb") as f:
+            while True:
+                headers = {"Range": f"bytes={written}-"} if written else {}
+                try:
+                    with session.get(
+                        url,
+                        headers=headers,
+                        stream=True,
+                        timeout=settings.VIDEO_DOWNLOAD_TIMEOUT_SECONDS,
+                    ) as response:
+                        response.raise_for_status()
+
+                        if written and response.status_code != 206:
+                            # Server ignored the Range header – start over.
+                            logger.warning("Range not supported, restarting download: %s", url)
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+
+                        for chunk in response.iter_content(chunk_size=settings.VIDEO_DOWNLOAD_CHUNK_BYTES):
+                            if chunk:
+                                f.write(chunk)
+                                written += len(chunk)
+                    break
+                except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                    resumes += 1
+                    if resumes > settings.VIDEO_DOWNLOAD_MAX_RESUMES:
+                        raise
+                    print("[Backend 🎤] Download: Connection toot gaya –", written, "bytes ke baad resume kar rahe hain!")
+                    logger.warning("Download interrupted at %d bytes, resuming (%d): %s", written, resumes, str(e))
+    except Exception:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    os.replace(part_path, dest_path)
+    print("[Backend 🎤] Download: Video aa gaya –", written, "bytes!")
+    logger.info("Video downloaded (%d bytes)", written)
+    return written
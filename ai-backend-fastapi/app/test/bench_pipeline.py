@@ -0,0 +1,188 @@
+"""
+Offline benchmark for the answer analysis pipeline (decode -> transcribe -> emotion -> score).
+
+Generates synthetic answer videos with ffmpeg, runs them through the same stages as
+process_answer_pipeline() in a pool of worker processes (like `app.worker --concurrency N`)
+and reports throughput, per-stage latency and peak RSS. No Mongo, Cloudinary or LLM
+calls: the analysis cache is disabled and scoring is replaced by a fixed-latency stub.
+
+    python -m app.test.bench_pipeline --lengths 15,60 --concurrency 1,2,4 --jobs 8
+    python -m app.test.bench_pipeline --speech fixtures/answer.wav --json bench.json
+    python -m app.test.bench_pipeline --baseline bench.json --tolerance 0.2   # exit 1 on regression
+
+--speech loops a real recording under the video (recommended – Whisper's cost depends on
+there being speech); without it a voiced tone pattern with pauses is used, which exercises
+VAD and decoding but not realistic decoding lengths. --face overlays a still image so the
+emotion stage sees a detectable face.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+# Synthetic "voice": 180 Hz carrier with vibrato, 1.5 s bursts separated by 0.4 s pauses
+SYNTHETIC_VOICE = "0.3*sin(2*PI*(180+40*sin(2*PI*3*t))*t)*lt(mod(t\\,1.9)\\,1.5)"
+
+
+def make_video(path: str, seconds: int, speech: Optional[str] = None, face: Optional[str] = None):
+    """Write a WebM (VP8/Opus) answer like the browser's MediaRecorder produces."""
+    cmd = ["ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=30:duration={seconds}"]
+    if speech:
+        cmd += ["-stream_loop", "-1", "-i", speech]
+    else:
+        cmd += ["-f", "lavfi", "-i", f"aevalsrc='{SYNTHETIC_VOICE}':s=48000:d={seconds}"]
+    if face:
+        cmd += ["-loop", "1", "-i", face, "-filter_complex", "[2:v]scale=-2:240[f];[0:v][f]overlay=(W-w)/2:(H-h)/2:shortest=1[v]", "-map", "[v]"]
+    else:
+        cmd += ["-map", "0:v"]
+    cmd += ["-map", "1:a", "-t", str(seconds), "-c:v", "libvpx", "-b:v", "1M", "-deadline", "realtime", "-c:a", "libopus", path]
+    subprocess.run(cmd, check=True)
+
+
+def _stub_score(question, transcript, emotion, confidence, latency_ms: int):
+    """Stands in for score_answer(): fixed LLM latency, same response shape."""
+    time.sleep(latency_ms / 1000)
+    return {"accuracy": 70, "communication": 70, "behavior": 70, "feedback": "benchmark"}
+
+
+def _init_worker(overrides: Dict[str, object]):
+    from app.core.config import settings
+
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+
+    from app.services.video_analysis_service import preload_models
+
+    preload_models()
+
+
+def _warmup(_):
+    time.sleep(0.5)  # keep the process busy so every pool slot gets its own process
+    return os.getpid()
+
+
+def _run_one(video_path: str, language: Optional[str], llm_latency_ms: int) -> Dict[str, object]:
+    from app.services.background_jobs import _analyze_video
+    from app.services.pipeline_metrics import StageTimer
+
+    timer = StageTimer()
+    transcript, emotion, confidence = _analyze_video(video_path, f"bench-{uuid.uuid4().hex}", language, None, timer)
+    timer.timed("score", _stub_score, "Tell me about yourself", transcript, emotion, confidence, llm_latency_ms)
+
+    timings = timer.as_doc()
+    timings.pop("finished_at")
+    # ru_maxrss: KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    timings["maxrss_mb"] = round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    return timings
+
+
+def run_level(video_path: str, concurrency: int, jobs: int, overrides, language, llm_latency_ms) -> Dict[str, object]:
+    from app.services.pipeline_metrics import summarize_timings
+
+    # Fresh pool per level: ru_maxrss is a per-process high-water mark
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(concurrency, mp_context=ctx, initializer=_init_worker, initargs=(overrides,)) as pool:
+        list(pool.map(_warmup, range(concurrency)))  # model loading is not part of the measurement
+
+        started = time.perf_counter()
+        results = list(pool.map(_run_one, [video_path] * jobs, [language] * jobs, [llm_latency_ms] * jobs))
+        wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "jobs": jobs,
+        "wall_s": round(wall, 2),
+        "throughput_per_min": round(jobs / wall * 60, 2),
+        "peak_rss_mb": max(r["maxrss_mb"] for r in results),
+        "stages": summarize_timings(results),
+    }
+
+
+def _print_level(length: int, level: Dict[str, object]):
+    print(
+        f"\n== {length}s video | concurrency {level['concurrency']} | {level['jobs']} jobs | "
+        f"{level['throughput_per_min']} answers/min | wall {level['wall_s']}s | peak RSS {level['peak_rss_mb']} MB"
+    )
+    print(f"   {'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for stage, stats in level["stages"].items():
+        print(f"   {stage:<12}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['max_ms']:>10}")
+
+
+def compare(results: List[Dict[str, object]], baseline: List[Dict[str, object]], tolerance: float) -> List[str]:
+    """Regressions vs. a previous --json run: slower p50 total or lower throughput beyond tolerance."""
+    previous = {(r["length_s"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = previous.get((r["length_s"], r["concurrency"]))
+        if not old:
+            continue
+        label = f"{r['length_s']}s @ concurrency {r['concurrency']}"
+        new_p50 = r["stages"]["total"]["p50_ms"]
+        old_p50 = old["stages"]["total"]["p50_ms"]
+        if new_p50 > old_p50 * (1 + tolerance):
+            regressions.append(f"{label}: p50 total {old_p50} -> {new_p50} ms")
+        if r["throughput_per_min"] < old["throughput_per_min"] * (1 - tolerance):
+            regressions.append(f"{label}: throughput {old['throughput_per_min']} -> {r['throughput_per_min']} /min")
+    return regressions
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline answer pipeline benchmark")
+    parser.add_argument("--lengths", type=_int_list, default=[15, 60], help="Video lengths in seconds, comma separated")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2], help="Worker processes, comma separated")
+    parser.add_argument("--jobs", type=int, default=0, help="Answers per level (default: 2 x concurrency)")
+    parser.add_argument("--speech", help="Spoken-audio fixture looped under the video")
+    parser.add_argument("--face", help="Still image overlaid on the video")
+    parser.add_argument("--language", help="Skip language detection (e.g. en)")
+    parser.add_argument("--llm-latency-ms", type=int, default=1500, help="Latency of the stubbed scoring call")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Previous --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs. baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    overrides = {"ANALYSIS_CACHE_ENABLED": False, "WORKER_PRELOAD_MODELS": True}
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-") as tmp:
+        for length in args.lengths:
+            video_path = os.path.join(tmp, f"answer_{length}s.webm")
+            print("[Backend 🎤] Bench:", length, "second ka synthetic video bana rahe hain...")
+            make_video(video_path, length, args.speech, args.face)
+
+            for concurrency in args.concurrency:
+                jobs = args.jobs or 2 * concurrency
+                level = run_level(video_path, concurrency, jobs, overrides, args.language, args.llm_latency_ms)
+                level["length_s"] = length
+                _print_level(length, level)
+                results.append(level)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print("\n[Backend 🎤] Bench: Results saved –", args.json)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n[Backend 🎤] Bench: Performance regression! 🚨")
+            for line in regressions:
+                print("   ", line)
+            sys.exit(1)
+        print("\n[Backend 🎤] Bench: Baseline se koi regression nahi ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Analysis worker – consumes the Mongo job queue (app.services.job_queue).
+
+Run one or more per node, separately from the API:
+    python -m app.worker --concurrency 4
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.database_sync import get_sync_db
+from app.core.logger import get_logger
+from app.services.analysis_cache import ensure_cache_indexes
+from app.services.llm_cache import ensure_llm_cache_indexes
+from app.services.job_queue import (
+    PROCESS_ANSWER_JOB,
+    STORE_VIDEO_JOB,
+    TRANSCRIBE_SEGMENT_JOB,
+    claim_job,
+    complete_job,
+    ensure_indexes,
+    fail_job,
+    heartbeat_job,
+)
+
+logger = get_logger(__name__)
+
+
+def _job_meta(job) -> dict:
+    """Who ran the job and how long it sat runnable in the queue (stored with the stage timings)."""
+    queue_wait_ms = None
+    if job.get("claimed_at") and job.get("available_at"):
+        queue_wait_ms = max(0, int((job["claimed_at"] - job["available_at"]).total_seconds() * 1000))
+    return {
+        "job_id": str(job["_id"]),
+        "worker_id": job.get("worker_id"),
+        "attempt": job.get("attempts"),
+        "queue_wait_ms": queue_wait_ms,
+    }
+
+
+def _run_process_answer(job):
+    # Imported here so the parent supervisor process never loads the ML stack.
+    from app.services.background_jobs import process_answer_pipeline
+
+    payload = job["payload"]
+    process_answer_pipeline(
+        payload["interview_id"],
+        payload["question_id"],
+        payload.get("video_url"),
+        local_path=payload.get("local_path"),
+        job_meta=_job_meta(job),
+        upload_id=payload.get("upload_id"),
+    )
+
+
+def _run_transcribe_segment(job):
+    from app.services.background_jobs import transcribe_segment_job
+
+    payload = job["payload"]
+    transcribe_segment_job(payload["interview_id"], payload["question_id"], payload["recording_path"])
+
+
+def _run_store_video(job):
+    from app.services.upload_spool import store_spooled_video
+
+    payload = job["payload"]
+    store_spooled_video(payload["interview_id"], payload["question_id"], payload["upload_id"], payload["spool_path"])
+
+
+def _store_video_failed(job):
+    from app.services.upload_spool import mark_storage_failed
+
+    payload = job["payload"]
+    mark_storage_failed(payload["interview_id"], payload["question_id"], payload["upload_id"], job.get("last_error") or "")
+
+
+def _answer_filter(payload) -> dict:
+    answer_filter = {"session_id": payload["interview_id"], "question_id": payload["question_id"]}
+    if payload.get("upload_id"):
+        answer_filter["upload_id"] = payload["upload_id"]  # a newer upload is not ours to touch
+    return answer_filter
+
+
+def _requeue_process_answer(job):
+    get_sync_db().interview_answers.update_one(
+        _answer_filter(job["payload"]),
+        {"$set": {"status": "queued", "retry_attempt": job["attempts"]}},
+    )
+
+
+def _fail_process_answer(job):
+    # Dead letter: out of attempts. When the job kept killing workers (lease expired on
+    # every attempt) the pipeline never got to mark the answer failed itself
+    answer_filter = _answer_filter(job["payload"])
+    print("[Backend 🎤] Worker: Job ke saare attempts khatam – answer status = failed!")
+    get_sync_db().interview_answers.update_one(
+        answer_filter,
+        {"$set": {"status": "failed", "error": job.get("last_error")}},
+    )
+
+
+# kind -> (handler, on_retry, on_dead)
+JOB_HANDLERS = {
+    PROCESS_ANSWER_JOB: (_run_process_answer, _requeue_process_answer, _fail_process_answer),
+    # Best-effort: the final process_answer job transcribes whatever is left
+    TRANSCRIBE_SEGMENT_JOB: (_run_transcribe_segment, None, None),
+    # Uploads the spooled answer video – runs where SPOOL_DIR is visible
+    STORE_VIDEO_JOB: (_run_store_video, None, _store_video_failed),
+}
+
+
+def _dead_letter(job):
+    on_dead = JOB_HANDLERS.get(job["kind"], (None, None, None))[2]
+    if on_dead is not None:
+        on_dead(job)
+
+
+class _Heartbeat:
+    """Keeps the job lease alive while a long stage (Whisper, DeepFace, LLM) runs."""
+
+    def __init__(self, job_id, worker_id: str):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            try:
+                if not heartbeat_job(self.job_id, self.worker_id):
+                    logger.warning("Lost lease on job=%s – another worker may pick it up", self.job_id)
+                    return
+            except Exception:
+                logger.exception("Heartbeat failed for job=%s", self.job_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def run_worker(worker_id: str):
+    stop = threading.Event()
+
+    def _handle_stop(signum, frame):
+        print("[Backend 🎤] Worker:", worker_id, "ko stop signal mila – current job khatam karke band hoga!")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _handle_stop)
+    signal.signal(signal.SIGINT, _handle_stop)
+
+    if settings.WORKER_PRELOAD_MODELS:
+        from app.services.video_analysis_service import preload_models
+
+        print("[Backend 🎤] Worker:", worker_id, "– ML models pehle se load kar rahe hain!")
+        preload_models()
+
+    print("[Backend 🎤] Worker:", worker_id, "ready – queue se jobs utha raha hai!")
+    logger.info("WORKER STARTED | worker=%s", worker_id)
+
+    while not stop.is_set():
+        try:
+            job = claim_job(worker_id, on_dead=_dead_letter)
+        except Exception:
+            logger.exception("Failed to claim job")
+            stop.wait(settings.WORKER_POLL_SECONDS)
+            continue
+
+        if job is None:
+            stop.wait(settings.WORKER_POLL_SECONDS)
+            continue
+
+        handler, on_retry, on_dead = JOB_HANDLERS.get(job["kind"], (None, None, None))
+        if handler is None:
+            fail_job(job, worker_id, f"Unknown job kind: {job['kind']}")
+            continue
+
+        try:
+            with _Heartbeat(job["_id"], worker_id):
+                handler(job)
+            complete_job(job["_id"], worker_id)
+        except Exception as e:
+            logger.exception("Job failed | kind=%s | job=%s", job["kind"], job["_id"])
+            if fail_job(job, worker_id, str(e)):
+                if on_retry is not None:
+                    on_retry(job)
+            elif on_dead is not None:
+                on_dead(job)
+
+    logger.info("WORKER STOPPED | worker=%s | at=%s", worker_id, datetime.utcnow().isoformat())
+
+
+def _worker_entry(index: int):
+    run_worker(f"{socket.gethostname()}:{os.getpid()}:{index}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Interview analysis worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.WORKER_CONCURRENCY,
+        help="Worker processes on this node (roughly one per spare core).",
+    )
+    args = parser.parse_args()
+
+    ensure_indexes()
+    ensure_cache_indexes()
+    ensure_llm_cache_indexes()
+
+    if args.concurrency <= 1:
+        _worker_entry(0)
+        return
+
+    # spawn (not fork): TensorFlow/Whisper are not fork-safe once loaded.
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_worker_entry, args=(i,), name=f"worker-{i}") for i in range(args.concurrency)]
+    for p in procs:
+        p.start()
+
+    def _forward_stop(signum, frame):
+        for p in procs:
+            if p.is_alive():
+                p.terminate()  # SIGTERM – children finish their current job first
+
+    signal.signal(signal.SIGTERM, _forward_stop)
+    signal.signal(signal.SIGINT, _forward_stop)
+
+    while any(p.is_alive() for p in procs):
+        time.sleep(1)
+
+
+if __name__ == "__main__":
+    main()